@@ -1,19 +1,16 @@
 import cv2
-from ultralytics import YOLO
-import pytesseract
 import os
-import time
-import serial
-import serial.tools.list_ports
-from collections import Counter
+import queue
 from database import ParkingDatabase
+from partitions import check_partitions
+from session_store import SessionStore
+from gate_controller import GateController, open_arduino
+from lanes import EntryLane
+from pipeline import FrameGrabber, DetectionPipeline, draw_boxes
+from plate_recognition import get_recognizer
 
-# Configure Tesseract path
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
-# Load trained YOLO model
-model = YOLO(r'D:\PRACTICE\parking-management-system\best.pt')
-
+# Shared YOLO + Tesseract engine (model is loaded once, on first use)
+recognizer = get_recognizer()
 
 # Plate save directory
 save_dir = 'plates'
@@ -21,114 +18,55 @@ os.makedirs(save_dir, exist_ok=True)
 
 # Initialize database
 db = ParkingDatabase()
+# Partitions are created by the scheduled `python partitions.py` job; only warn here
+check_partitions(db)
+# Entries are answered from memory and written behind to Postgres
+sessions = SessionStore(db, 'entry').start()
 
-# ===== Auto-detect Arduino Serial Port =====
-def detect_arduino_port():
-    ports = list(serial.tools.list_ports.comports())
-    for port in ports:
-        if "COM12" in port.device or "COM" in port.device:
-            return port.device
-    return None
-
-# Initialize Arduino connection
-arduino_port = detect_arduino_port()
-arduino = None
-if arduino_port:
-    try:
-        arduino = serial.Serial(arduino_port, 9600, timeout=1)
-        print(f"[ARDUINO] Connected to {arduino_port}")
-    except:
-        print("[ARDUINO] Failed to connect")
-        arduino = None
+# Gate controller owns the Arduino link; commands never block detection
+gate = GateController(open_arduino(), hold_seconds=15, name="Entry")  # Gate open duration
 
 # Mock ultrasonic sensor for testing
 def mock_ultrasonic_distance():
     return 30  # Simulate vehicle at 30cm
 
-# Initialize webcam
-cap = cv2.VideoCapture(0)
-plate_buffer = []
-entry_cooldown = 300  # 5 minutes
-last_saved_plate = None
-last_entry_time = 0
-
-print("[SYSTEM] Ready. Press 'q' to exit.")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    distance = mock_ultrasonic_distance()
-    print(f"[SENSOR] Distance: {distance} cm")
+# Capture, detection and OCR run on their own threads
+grabber = FrameGrabber(0)
+pipeline = DetectionPipeline(
+    grabber, recognizer,
+    should_detect=lambda: mock_ultrasonic_distance() <= 50
+)
 
-    if distance <= 50:
-        results = model(frame)
+# Records the entry and opens, skipping the same car within 5 minutes
+lane = EntryLane(sessions, gate, cooldown=300)
 
-        for result in results:
-            for box in result.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                plate_img = frame[y1:y2, x1:x2]
-
-                # Plate Image Processing
-                gray = cv2.cvtColor(plate_img, cv2.COLOR_BGR2GRAY)
-                blur = cv2.GaussianBlur(gray, (5, 5), 0)
-                thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-
-                # OCR Extraction
-                plate_text = pytesseract.image_to_string(
-                    thresh, config='--psm 8 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
-                ).strip().replace(" ", "")
-
-                # Plate Validation
-                if "RA" in plate_text:
-                    start_idx = plate_text.find("RA")
-                    plate_candidate = plate_text[start_idx:]
-                    if len(plate_candidate) >= 7:
-                        plate_candidate = plate_candidate[:7]
-                        prefix, digits, suffix = plate_candidate[:3], plate_candidate[3:6], plate_candidate[6]
-                        if (prefix.isalpha() and prefix.isupper() and
-                            digits.isdigit() and suffix.isalpha() and suffix.isupper()):
-                            print(f"[VALID] Plate Detected: {plate_candidate}")
-                            plate_buffer.append(plate_candidate)
-
-                            # Decision after 3 captures
-                            if len(plate_buffer) >= 3:
-                                most_common = Counter(plate_buffer).most_common(1)[0][0]
-                                current_time = time.time()
-
-                                if (most_common != last_saved_plate or
-                                    (current_time - last_entry_time) > entry_cooldown):
-
-                                    # Add to database instead of CSV
-                                    db.add_vehicle_entry(most_common)
-                                    print(f"[SAVED] {most_common} logged to database.")
-
-                                    if arduino:
-                                        arduino.write(b'1')
-                                        print("[GATE] Opening gate (sent '1')")
-                                        time.sleep(15)  # Gate open duration
-                                        arduino.write(b'0')
-                                        print("[GATE] Closing gate (sent '0')")
+pipeline.start()
+print("[SYSTEM] Ready. Press 'q' to exit.")
 
-                                    last_saved_plate = most_common
-                                    last_entry_time = current_time
-                                else:
-                                    print("[SKIPPED] Duplicate within 5 min window.")
+while grabber.running:
+    # Consume every plate the tracker committed since the last frame
+    while True:
+        try:
+            decision = pipeline.events.get_nowait()
+        except queue.Empty:
+            break
 
-                                plate_buffer.clear()
+        plate = decision.plate
+        print(f"[VALID] Plate Detected: {plate} ({decision.reads} reads, "
+              f"agreement {decision.agreement:.0%})")
+        cv2.imshow("Plate", decision.best_read.crop)
+        cv2.imshow("Processed", decision.best_read.processed)
 
-                cv2.imshow("Plate", plate_img)
-                cv2.imshow("Processed", thresh)
-                time.sleep(0.5)
+        lane.handle(plate)
 
-    annotated_frame = results[0].plot() if distance <= 50 else frame
-    cv2.imshow('Webcam Feed', annotated_frame)
+    frame, boxes = pipeline.latest
+    if frame is not None:
+        cv2.imshow('Webcam Feed', draw_boxes(frame, boxes))
 
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    if cv2.waitKey(30) & 0xFF == ord('q'):
         break
 
-cap.release()
-if arduino:
-    arduino.close()
-cv2.destroyAllWindows()
\ No newline at end of file
+pipeline.stop()
+gate.shutdown()
+sessions.stop()
+cv2.destroyAllWindows()
@@ -0,0 +1,183 @@
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from detector_backends import create_detector
+from plate_tracker import box_iou
+
+# Accuracy and latency of every available detector backend on the
+# validation set, against the PyTorch model and the ground-truth labels:
+#   python compare_detectors.py [torch onnx onnx-int8 openvino openvino-int8] [--images DIR]
+# Variants whose model has not been exported (or whose runtime is not
+# installed) are skipped. Matches are counted at IoU >= MATCH_IOU. Each
+# variant is also run on batches of BATCH_SIZE frames, as InferenceService
+# sends them, and must find the same boxes as frame by frame.
+VARIANTS = {
+    'torch': ('torch', False),
+    'onnx': ('onnx', False),
+    'onnx-int8': ('onnx', True),
+    'openvino': ('openvino', False),
+    'openvino-int8': ('openvino', True),
+}
+MATCH_IOU = 0.5
+REFERENCE = 'torch'
+BATCH_SIZE = 4
+BATCH_MATCH_IOU = 0.9
+
+
+def load_labels(image_path, shape):
+    """YOLO-format boxes for an image from ../labels/<name>.txt, in pixels"""
+    label_path = os.path.splitext(image_path.replace(os.sep + 'images' + os.sep,
+                                                     os.sep + 'labels' + os.sep))[0] + '.txt'
+    if not os.path.exists(label_path):
+        return None
+    height, width = shape[:2]
+    boxes = []
+    with open(label_path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) != 5:
+                continue
+            cx, cy, w, h = (float(value) for value in parts[1:])
+            boxes.append((int((cx - w / 2) * width), int((cy - h / 2) * height),
+                          int((cx + w / 2) * width), int((cy + h / 2) * height)))
+    return boxes
+
+
+def match(predicted, expected, threshold=MATCH_IOU):
+    """Greedy one-to-one matching -> (matches, summed IoU of the matches)"""
+    unmatched = list(expected)
+    matches, total_iou = 0, 0.0
+    for box in predicted:
+        scores = [box_iou(box, other) for other in unmatched]
+        if scores and max(scores) >= threshold:
+            best = int(np.argmax(scores))
+            total_iou += scores[best]
+            unmatched.pop(best)
+            matches += 1
+    return matches, total_iou
+
+
+def precision_recall(pairs):
+    """Precision and recall over (predicted, expected) box lists"""
+    found = sum(len(predicted) for predicted, _ in pairs)
+    wanted = sum(len(expected) for _, expected in pairs)
+    matched = sum(match(predicted, expected)[0] for predicted, expected in pairs)
+    return (matched / found if found else 1.0), (matched / wanted if wanted else 1.0)
+
+
+def run_batched(detector, frames, batch_size=BATCH_SIZE, repeat=3):
+    """Boxes per frame and per-frame latencies (ms) when detecting batch_size frames at once"""
+    detector.detect_batch(frames[:batch_size])  # warm-up
+    latencies, boxes = [], []
+    for _ in range(repeat):
+        boxes = []
+        for start in range(0, len(frames), batch_size):
+            batch = frames[start:start + batch_size]
+            started = time.perf_counter()
+            boxes.extend(detector.detect_batch(batch))
+            latencies.append(1000 * (time.perf_counter() - started) / len(batch))
+    return boxes, latencies
+
+
+def same_boxes(batched, single, threshold=BATCH_MATCH_IOU):
+    """Frames whose batched boxes pair up one-to-one with the frame-by-frame ones"""
+    return sum(len(b) == len(s) and match(b, s, threshold)[0] == len(s)
+               for b, s in zip(batched, single))
+
+
+def run_variant(name, frames, repeat=3):
+    """Boxes per frame, per-frame latencies (ms), load time and batched run of one variant
+
+    The batched run is (boxes, latencies), or the error that stopped it.
+    """
+    backend, int8 = VARIANTS[name]
+    started = time.perf_counter()
+    detector = create_detector(backend, int8=int8)
+    load_seconds = time.perf_counter() - started
+    detector.detect(frames[0])  # warm-up
+    latencies, boxes = [], []
+    for _ in range(repeat):
+        boxes = []
+        for frame in frames:
+            started = time.perf_counter()
+            boxes.append(detector.detect(frame))
+            latencies.append(1000 * (time.perf_counter() - started))
+    try:
+        batched = run_batched(detector, frames, repeat=repeat)
+    except Exception as e:
+        print(f"[COMPARE] {name}: batches of {BATCH_SIZE} failed: {e}")
+        batched = e
+    return boxes, latencies, load_seconds, batched
+
+
+def compare(names, image_dir):
+    paths = sorted(glob.glob(os.path.join(image_dir, '*.jpg')) + glob.glob(os.path.join(image_dir, '*.png')))
+    frames, labels = [], []
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is not None:
+            frames.append(frame)
+            labels.append(load_labels(path, frame.shape))
+    if not frames:
+        raise ValueError(f"No images in {image_dir}")
+    has_labels = all(label is not None for label in labels)
+
+    results = {}
+    for name in names:
+        try:
+            results[name] = run_variant(name, frames)
+        except (ImportError, FileNotFoundError) as e:
+            print(f"[COMPARE] Skipping {name}: {e}")
+
+    reference = results.get(REFERENCE)
+    print(f"\n[COMPARE] {len(frames)} image(s) from {image_dir}, matches at IoU >= {MATCH_IOU}")
+    header = (f"{'variant':<14} {'load s':>7} {'mean ms':>8} {'p95 ms':>8} {'speedup':>8} {'boxes':>6}"
+              f" {f'x{BATCH_SIZE} ms':>8} {'batch same':>11}")
+    if reference:
+        header += f" {'agree P/R vs ' + REFERENCE:>18} {'mean IoU':>9}"
+    if has_labels:
+        header += f" {'P/R vs labels':>14}"
+    print(header)
+    reference_mean = np.mean(reference[1]) if reference else None
+    for name, (boxes, latencies, load_seconds, batched) in results.items():
+        mean = np.mean(latencies)
+        speedup = f"{reference_mean / mean:.2f}x" if reference else '-'
+        row = (f"{name:<14} {load_seconds:>7.2f} {mean:>8.1f} {np.percentile(latencies, 95):>8.1f} "
+               f"{speedup:>8} {sum(len(b) for b in boxes):>6}")
+        if isinstance(batched, Exception):
+            row += f" {'failed':>8} {'-':>11}"
+        else:
+            batched_boxes, batched_latencies = batched
+            same = f"{same_boxes(batched_boxes, boxes)}/{len(frames)}"
+            row += f" {np.mean(batched_latencies):>8.1f} {same:>11}"
+        if reference:
+            pairs = list(zip(boxes, reference[0]))
+            precision, recall = precision_recall(pairs)
+            matched = [match(predicted, expected) for predicted, expected in pairs]
+            count = sum(m for m, _ in matched)
+            mean_iou = sum(iou for _, iou in matched) / count if count else 0.0
+            row += f" {f'{precision:.3f}/{recall:.3f}':>18} {mean_iou:>9.3f}"
+        if has_labels:
+            precision, recall = precision_recall(list(zip(boxes, labels)))
+            row += f" {f'{precision:.3f}/{recall:.3f}':>14}"
+        print(row)
+    return results
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    image_dir = os.path.join('dataset', 'val', 'images')
+    if '--images' in args:
+        index = args.index('--images')
+        image_dir = args[index + 1]
+        del args[index:index + 2]
+    unknown = [name for name in args if name not in VARIANTS]
+    if unknown:
+        print(f"Unknown variant(s): {', '.join(unknown)} (expected {', '.join(VARIANTS)})")
+        sys.exit(1)
+    compare(args or list(VARIANTS), image_dir)
@@ -1,12 +1,10 @@
 import cv2
-from ultralytics import YOLO
-import pytesseract
 import os
 import time
-import re
+from plate_recognition import get_recognizer
 
-# Load YOLOv8 model (update path if needed)
-model = YOLO('/opt/homebrew/runs/detect/train4/weights/best.pt')
+# Shared YOLO + Tesseract engine (set YOLO_MODEL_PATH in .env to pick the weights)
+recognizer = get_recognizer()
 
 # Create folder to save cropped plates
 save_dir = 'plates'
@@ -21,66 +19,35 @@ while True:
     if not ret:
         break
 
-    # Run YOLO inference
-    results = model(frame)
+    # Run YOLO inference + OCR on every detected plate
+    reads = recognizer.recognize(frame)
 
-    for result in results:
-        for box in result.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
+    for read in reads:
+        # Save cropped plate
+        plate_filename = f'{save_dir}/plate_{plate_count}.jpg'
+        cv2.imwrite(plate_filename, read.crop)
+        plate_count += 1
 
-            # Crop detected plate
-            plate_img = frame[y1:y2, x1:x2]
+        # ===== Validation Result =====
+        if read.plate:
+            print(f"✅ Valid Plate: {read.plate}")
+        else:
+            print(f"❌ No valid RA plate found in: '{read.raw_text}'")
 
-            # Save cropped plate
-            plate_filename = f'{save_dir}/plate_{plate_count}.jpg'
-            cv2.imwrite(plate_filename, plate_img)
-            plate_count += 1
-
-            # ===== COOL Plate Processing =====
-            gray = cv2.cvtColor(plate_img, cv2.COLOR_BGR2GRAY)
-            blur = cv2.GaussianBlur(gray, (5, 5), 0)
-            thresh = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-
-            # ===== OCR Extraction =====
-            plate_text = pytesseract.image_to_string(
-                thresh,
-                config='--psm 8 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
-            ).strip()
-
-            # ===== Validation Logic with 8th Char Tolerance =====
-            match = re.search(r'RA[A-Z0-9 ]*', plate_text.upper())
-            if match:
-                plate_candidate = match.group()
-                plate_clean = plate_candidate.replace(" ", "")
-
-                if len(plate_clean) == 8:
-                    plate_clean = plate_clean[:7]  # Trim extra char
-
-                if len(plate_clean) == 7:
-                    first_three = plate_clean[:3]
-                    digits_part = plate_clean[3:6]
-                    last_char = plate_clean[6]
-
-                    if first_three.isalpha() and digits_part.isdigit() and last_char.isalpha():
-                        print(f"✅ Valid Plate: {plate_clean}")
-                    else:
-                        print(f"❌ Invalid Format: {plate_clean}")
-                else:
-                    print(f"❌ Incorrect Length after cleaning: {plate_clean}")
-            else:
-                print(f"❌ No valid RA plate found in: '{plate_text}'")
-
-            # Show processed images
-            cv2.imshow("Cropped Plate", plate_img)
-            cv2.imshow("Processed Plate", thresh)
-            time.sleep(1)
+        # Show processed images
+        cv2.imshow("Cropped Plate", read.crop)
+        cv2.imshow("Processed Plate", read.processed)
+        time.sleep(1)
 
     # Show annotated webcam frame
-    annotated_frame = results[0].plot()
+    annotated_frame = frame.copy()
+    for read in reads:
+        x1, y1, x2, y2 = read.box
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
     cv2.imshow('Webcam Detection', annotated_frame)
 
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
 cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+cv2.destroyAllWindows()
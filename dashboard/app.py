@@ -1,48 +1,139 @@
-from flask import Flask, render_template, jsonify
+import os
+
+# DASHBOARD_MODE=production runs on eventlet green threads; the patching has
+# to happen before anything else imports socket or threading
+PRODUCTION = os.getenv('DASHBOARD_MODE', 'development') == 'production'
+if PRODUCTION:
+    import eventlet
+    eventlet.monkey_patch()
+
+from flask import Flask, render_template, jsonify, request
 from flask_socketio import SocketIO
-from database import ParkingDatabase
+from database import ParkingDatabase, GRANULARITIES, TREND_PERIODS, make_psycopg_green
+from parking_events import ParkingEventListener
+from cache import TTLCache
 from datetime import datetime, timedelta
 import json
 
+# Production deployment: run several single-worker processes behind a proxy
+# with sticky sessions (e.g. nginx ip_hash), each with
+#   DASHBOARD_MODE=production PORT=500x SOCKETIO_MESSAGE_QUEUE=redis://...
+# or `gunicorn -k eventlet -w 1 app:app` per process. The message queue
+# carries emits between processes so every browser sees every update.
 app = Flask(__name__)
-app.config['SECRET_KEY'] = 'parking_management_secret'
-socketio = SocketIO(app)
+app.config['SECRET_KEY'] = os.getenv('DASHBOARD_SECRET_KEY', 'parking_management_secret')
+# Development is pinned to real threads: left to auto-detect, Flask-SocketIO
+# picks eventlet (it is installed) without monkey patching, and the event
+# listener's blocking select() would then starve every request
+socketio = SocketIO(
+    app,
+    async_mode='eventlet' if PRODUCTION else 'threading',
+    message_queue=os.getenv('SOCKETIO_MESSAGE_QUEUE')
+)
+if PRODUCTION:
+    make_psycopg_green()
 db = ParkingDatabase()
 
+# Arbitrary advisory lock key; the process holding it relays parking events
+# to browsers, the others only drop their caches
+EVENT_RELAY_LOCK_ID = 72_450_002
+
+# API responses are shared by all clients for a few seconds and dropped as
+# soon as a parking event changes them
+cache = TTLCache()
+CACHE_TTLS = {
+    'parking_stats': float(os.getenv('CACHE_TTL_PARKING_STATS', '10')),
+    'hourly_stats': float(os.getenv('CACHE_TTL_HOURLY_STATS', '60')),
+    'trends_weekly': float(os.getenv('CACHE_TTL_TRENDS', '300')),
+    'trends_monthly': float(os.getenv('CACHE_TTL_TRENDS', '300'))
+}
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/api/parking_stats')
-def get_parking_stats():
-    # Get current occupancy
-    occupied_spaces = db.get_current_occupancy()
-    
-    # Get today's revenue
-    today = datetime.now().date()
-    revenue = db.get_daily_revenue(today)
-    
-    # Get recent activities
-    recent_activities = db.get_recent_activities(limit=5)
+def load_parking_stats():
+    # Counters, today's totals and both feeds in one query
+    snapshot = db.get_snapshot(datetime.now().date(), limit=5)
     
-    # Get unauthorized attempts
-    unauthorized_attempts = db.get_unauthorized_attempts(limit=5)
-    
-    return jsonify({
-        'occupancy': occupied_spaces,
-        'revenue': revenue,
-        'recent_activities': recent_activities,
-        'unauthorized_attempts': unauthorized_attempts
-    })
+    return {
+        'occupancy': snapshot['occupancy'],
+        'revenue': snapshot['revenue'],
+        'entries_today': snapshot['entries'],
+        'exits_today': snapshot['exits'],
+        'recent_activities': snapshot['recent_activities'],
+        'unauthorized_attempts': snapshot['unauthorized_attempts']
+    }
 
-@app.route('/api/hourly_stats')
-def get_hourly_stats():
+def load_hourly_stats():
     # Get hourly statistics for the past 24 hours
     now = datetime.now()
     yesterday = now - timedelta(days=1)
-    hourly_data = db.get_hourly_statistics(yesterday, now)
-    
-    return jsonify(hourly_data)
+    return db.get_hourly_statistics(yesterday, now)
+
+@app.route('/api/parking_stats')
+def get_parking_stats():
+    return jsonify(cache.get_or_load('parking_stats', load_parking_stats, CACHE_TTLS['parking_stats']))
+
+# Bucket width and default chart window per granularity, and a cap on
+# buckets per request
+BUCKET_WIDTHS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1)
+}
+DEFAULT_WINDOWS = {
+    'hour': timedelta(days=1),
+    'day': timedelta(days=30),
+    'week': timedelta(weeks=26)
+}
+MAX_BUCKETS = 1000
+
+def parse_timestamp(value):
+    # Rows store naive local time; an offset (valid ISO 8601) is converted to it.
+    # An unencoded '+hh:mm' in a query string arrives as ' hh:mm', so a value
+    # that only parses with its last space read as '+' gets that offset
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except ValueError:
+        head, space, offset = value.rpartition(' ')
+        if not space:
+            raise
+        timestamp = datetime.fromisoformat(f"{head}+{offset}")
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+@app.route('/api/hourly_stats')
+def get_hourly_stats():
+    # ?granularity=hour|day|week&start=...&end=... (ISO 8601); the default
+    # 24-hour chart is cached, custom windows are computed on demand
+    if not request.args:
+        return jsonify(cache.get_or_load('hourly_stats', load_hourly_stats, CACHE_TTLS['hourly_stats']))
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f'granularity must be one of {", ".join(GRANULARITIES)}'}), 400
+    try:
+        end = parse_timestamp(request.args['end']) if 'end' in request.args else datetime.now()
+        start = (parse_timestamp(request.args['start']) if 'start' in request.args
+                 else end - DEFAULT_WINDOWS[granularity])
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 timestamps'}), 400
+    if start > end or (end - start) / BUCKET_WIDTHS[granularity] > MAX_BUCKETS:
+        return jsonify({'error': f'window must be ordered and span at most {MAX_BUCKETS} buckets'}), 400
+    return jsonify(db.get_entry_statistics(start, end, granularity))
+
+@app.route('/api/trends/<period>')
+def get_trends(period):
+    # Last 12 weeks or months, served from the daily rollups
+    if period not in TREND_PERIODS:
+        return jsonify({'error': f'period must be one of {", ".join(TREND_PERIODS)}'}), 400
+    key = f'trends_{period}'
+    return jsonify(cache.get_or_load(key, lambda: db.get_trends(period), CACHE_TTLS[key]))
+
+@app.route('/api/cache_stats')
+def get_cache_stats():
+    return jsonify(cache.stats())
 
 @socketio.on('connect')
 def handle_connect():
@@ -59,5 +150,63 @@ def emit_update(event_type, data):
         'timestamp': datetime.now().isoformat()
     })
 
+# Activity feed labels, as in get_recent_activities
+EVENT_ACTIONS = {
+    'entry': 'Vehicle Entry',
+    'exit': 'Vehicle Exit',
+    'payment': 'Payment Processed'
+}
+
+def handle_parking_event(event):
+    """Fan one committed gate/payment event out to every browser as deltas"""
+    event_type = event['type']
+    cache.invalidate('parking_stats', 'trends_weekly', 'trends_monthly')
+    if event_type == 'entry':
+        cache.invalidate('hourly_stats')
+    if not listener.is_leader:
+        return  # another dashboard process emits; the queue delivers it here
+    if event_type in EVENT_ACTIONS:
+        # One primary-key lookup per event, however many tabs are open
+        summary = db.get_summary(datetime.now().date())
+        emit_update('stats', {
+            'occupancy': summary['occupancy'],
+            'revenue': summary['revenue']
+        })
+        emit_update('activity', {
+            'plate_number': event['plate_number'],
+            'action': EVENT_ACTIONS[event_type],
+            'timestamp': event['timestamp']
+        })
+    if event_type == 'entry':
+        emit_update('hourly_entry', {'timestamp': event['timestamp']})
+    elif event_type == 'unauthorized':
+        emit_update('unauthorized_attempt', {
+            'plate_number': event['plate_number'],
+            'gate_location': event.get('gate_location'),
+            'timestamp': event['timestamp']
+        })
+
+def handle_listener_connect():
+    # Events may have been missed while disconnected; clients refetch once
+    cache.invalidate(*CACHE_TTLS)
+    if listener.is_leader:
+        emit_update('refresh', {})
+
+listener = ParkingEventListener(
+    db.conn_params, handle_parking_event, on_connect=handle_listener_connect,
+    sleep=socketio.sleep, leader_lock_id=EVENT_RELAY_LOCK_ID)
+
+def start_event_listener():
+    socketio.start_background_task(listener.run)
+
+if PRODUCTION:
+    # Also covers gunicorn, which imports the module without running __main__
+    start_event_listener()
+
 if __name__ == '__main__':
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    port = int(os.getenv('PORT', '5000'))
+    if PRODUCTION:
+        socketio.run(app, host='0.0.0.0', port=port)
+    else:
+        start_event_listener()
+        socketio.run(app, debug=True, host='0.0.0.0', port=port) 
\ No newline at end of file
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import defaultdict
+
+class _Flight:
+    """A load in progress; concurrent callers for the same key wait on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class TTLCache:
+    """Small in-process cache with per-key TTL and single-flight loading.
+
+    On a miss the first caller runs the loader while concurrent callers for
+    the same key wait for its result, so N clients cost one query set per
+    TTL window. ``invalidate`` drops a key immediately; a load that was
+    already running when its key was invalidated is returned to its waiters
+    but not stored.
+    """
+
+    def __init__(self, default_ttl=10.0, clock=time.monotonic):
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._entries = {}      # key -> (value, expires_at)
+        self._inflight = {}     # key -> _Flight
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+        self._metrics = defaultdict(lambda: defaultdict(int))
+
+    def get_or_load(self, key, loader, ttl=None):
+        now = self.clock()
+        with self._lock:
+            metrics = self._metrics[key]
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                metrics['hits'] += 1
+                return entry[0]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                metrics['misses'] += 1
+                flight = self._inflight[key] = _Flight()
+                generation = self._generations[key]
+            else:
+                metrics['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                metrics['errors'] += 1
+            raise
+        else:
+            expires_at = self.clock() + (self.default_ttl if ttl is None else ttl)
+            with self._lock:
+                if self._generations[key] == generation:
+                    self._entries[key] = (flight.value, expires_at)
+            return flight.value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._generations[key] += 1
+                self._entries.pop(key, None)
+                self._metrics[key]['invalidations'] += 1
+
+    def stats(self):
+        """Per-key counters plus hit ratio (coalesced waits count as hits)"""
+        with self._lock:
+            report = {}
+            for key, metrics in self._metrics.items():
+                served = metrics['hits'] + metrics['coalesced']
+                total = served + metrics['misses']
+                report[key] = dict(metrics, hit_ratio=round(served / total, 3) if total else None)
+            return report
@@ -1,11 +1,82 @@
-import psycopg2
 from datetime import datetime, timedelta
 import os
+import sys
 from dotenv import load_dotenv
+import psycopg2
+from psycopg2 import extensions
+
+# The connection pool lives next to the gate-side database module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_pool import get_pool
 
 # Load environment variables
 load_dotenv()
 
+# Chart granularities: bucket width, label format and the rollup they read
+GRANULARITIES = {
+    'hour': ('1 hour', '%H:00', 'hourly_rollups', 'hour'),
+    'day': ('1 day', '%Y-%m-%d', 'daily_stats', 'day::timestamp'),
+    'week': ('1 week', 'Week of %Y-%m-%d', 'daily_stats', 'day::timestamp')
+}
+
+# Trend periods and the date_trunc unit they group daily rollups by
+TREND_PERIODS = {
+    'weekly': 'week',
+    'monthly': 'month'
+}
+
+# Latest entries, exits and payments. Each branch stops after %(limit)s rows
+# of its own index, so the feed reads O(limit) rows however big vehicles is.
+ACTIVITY_FEED = '''
+    (
+        SELECT plate_number, 'Vehicle Entry' AS action, entry_time AS timestamp
+        FROM vehicles
+        ORDER BY entry_time DESC
+        LIMIT %(limit)s
+    )
+    UNION ALL
+    (
+        SELECT plate_number, 'Vehicle Exit' AS action, exit_time AS timestamp
+        FROM vehicles
+        WHERE exit_time IS NOT NULL
+        ORDER BY exit_time DESC
+        LIMIT %(limit)s
+    )
+    UNION ALL
+    (
+        SELECT plate_number, 'Payment Processed' AS action, payment_time AS timestamp
+        FROM vehicles
+        WHERE payment_status = 1 AND payment_time IS NOT NULL
+        ORDER BY payment_time DESC
+        LIMIT %(limit)s
+    )
+    ORDER BY timestamp DESC
+    LIMIT %(limit)s
+'''
+
+def make_psycopg_green():
+    """Make psycopg2 cooperative under eventlet.
+
+    Queries then wait on the socket through the eventlet hub instead of
+    blocking the whole process, so one slow query only stalls its own
+    request. Concurrency stays bounded by the connection pool (DB_POOL_MAX):
+    extra requests wait for a free connection.
+    """
+    extensions.set_wait_callback(_eventlet_wait)
+
+def _eventlet_wait(conn, timeout=None):
+    from eventlet.hubs import trampoline
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state}")
+
 class ParkingDatabase:
     def __init__(self):
         self.conn_params = {
@@ -15,77 +86,91 @@ class ParkingDatabase:
             'user': os.getenv('DB_USER', 'postgres'),
             'password': os.getenv('DB_PASSWORD', 'agnes')
         }
+        self.pool = get_pool(self.conn_params)
 
     def get_connection(self):
-        """Create a new database connection"""
-        return psycopg2.connect(**self.conn_params)
+        """Borrow a pooled connection; use as ``with db.get_connection() as conn:``"""
+        return self.pool.connection()
 
     def get_current_occupancy(self):
         """Get the current number of vehicles in the parking lot"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
-            # Count vehicles that have entered but not exited
-            cursor.execute('''
-                SELECT COUNT(*) FROM vehicles 
-                WHERE exit_time IS NULL
-            ''')
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            # Maintained by the gate writes, so no scan of vehicles
+            cursor.execute('SELECT occupancy FROM parking_counters')
             occupancy = cursor.fetchone()[0]
             return occupancy
-        finally:
-            conn.close()
 
     def get_daily_revenue(self, date):
         """Get total revenue for a specific date"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT revenue FROM daily_stats WHERE day = %s::date', (date,))
+            row = cursor.fetchone()
+            return float(row[0]) if row else 0
+
+    def get_summary(self, date):
+        """Occupancy and the day's totals in one primary-key lookup"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                SELECT COALESCE(SUM(payment_amount), 0) 
-                FROM vehicles 
-                WHERE DATE(payment_time) = %s 
-                AND payment_status = 1
+                SELECT c.occupancy,
+                       COALESCE(d.entries, 0), COALESCE(d.exits, 0),
+                       COALESCE(d.payments, 0), COALESCE(d.revenue, 0)
+                FROM parking_counters c
+                LEFT JOIN daily_stats d ON d.day = %s::date
             ''', (date,))
-            revenue = cursor.fetchone()[0]
-            return float(revenue) if revenue else 0
-        finally:
-            conn.close()
+            row = cursor.fetchone()
+            return {
+                "occupancy": row[0],
+                "entries": row[1],
+                "exits": row[2],
+                "payments": row[3],
+                "revenue": float(row[4])
+            }
+
+    def get_snapshot(self, date, limit=5):
+        """Occupancy, the day's totals and both feeds in a single round trip"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT
+                    c.occupancy,
+                    COALESCE(d.entries, 0),
+                    COALESCE(d.exits, 0),
+                    COALESCE(d.revenue, 0),
+                    (
+                        SELECT COALESCE(json_agg(feed ORDER BY feed.timestamp DESC), '[]')
+                        FROM (''' + ACTIVITY_FEED + ''') feed
+                    ),
+                    (
+                        SELECT COALESCE(json_agg(attempt ORDER BY attempt.timestamp DESC), '[]')
+                        FROM (
+                            SELECT plate_number, gate_location, timestamp
+                            FROM unauthorized_exits
+                            ORDER BY timestamp DESC
+                            LIMIT %(limit)s
+                        ) attempt
+                    )
+                FROM parking_counters c
+                LEFT JOIN daily_stats d ON d.day = %(day)s::date
+            ''', {'day': date, 'limit': limit})
+            row = cursor.fetchone()
+            # json_agg renders timestamps in ISO 8601, as isoformat() does
+            return {
+                "occupancy": row[0],
+                "entries": row[1],
+                "exits": row[2],
+                "revenue": float(row[3]),
+                "recent_activities": row[4],
+                "unauthorized_attempts": row[5]
+            }
 
     def get_recent_activities(self, limit=5):
         """Get recent parking activities"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                (
-                    SELECT 
-                        plate_number,
-                        'Vehicle Entry' as action,
-                        entry_time as timestamp
-                    FROM vehicles
-                    WHERE entry_time IS NOT NULL
-                )
-                UNION ALL
-                (
-                    SELECT 
-                        plate_number,
-                        'Vehicle Exit' as action,
-                        exit_time as timestamp
-                    FROM vehicles
-                    WHERE exit_time IS NOT NULL
-                )
-                UNION ALL
-                (
-                    SELECT 
-                        plate_number,
-                        'Payment Processed' as action,
-                        payment_time as timestamp
-                    FROM vehicles
-                    WHERE payment_time IS NOT NULL
-                )
-                ORDER BY timestamp DESC
-                LIMIT %s
-            ''', (limit,))
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(ACTIVITY_FEED, {'limit': limit})
             
             activities = []
             for row in cursor.fetchall():
@@ -95,14 +180,11 @@ class ParkingDatabase:
                     "timestamp": row[2].isoformat() if row[2] else None
                 })
             return activities
-        finally:
-            conn.close()
 
     def get_unauthorized_attempts(self, limit=5):
         """Get recent unauthorized exit attempts"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
                 SELECT plate_number, gate_location, timestamp
                 FROM unauthorized_exits
@@ -118,36 +200,105 @@ class ParkingDatabase:
                     "timestamp": row[2].isoformat() if row[2] else None
                 })
             return attempts
-        finally:
-            conn.close()
 
     def get_hourly_statistics(self, start_time, end_time):
         """Get hourly vehicle entry statistics"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
+        return self.get_entry_statistics(start_time, end_time, 'hour')
+
+    def get_entry_statistics(self, start_time, end_time, granularity='hour'):
+        """Vehicle entries per hour, day or week between start_time and end_time.
+
+        Counts come from the hourly or daily rollup, joined to a
+        generate_series of buckets so empty buckets show as 0; a multi-year
+        window reads one row per day.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        step, label_format, table, column = GRANULARITIES[granularity]
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                WITH RECURSIVE hours AS (
-                    SELECT date_trunc('hour', %s::timestamp) as hour
-                    UNION ALL
-                    SELECT hour + interval '1 hour'
-                    FROM hours
-                    WHERE hour < date_trunc('hour', %s::timestamp)
+                WITH bounds AS (
+                    SELECT date_trunc(%(unit)s, %(start)s::timestamp) AS first_bucket,
+                           date_trunc(%(unit)s, %(end)s::timestamp) AS last_bucket
+                ),
+                buckets AS (
+                    SELECT generate_series(first_bucket, last_bucket, %(step)s::interval) AS bucket
+                    FROM bounds
+                ),
+                counts AS (
+                    SELECT date_trunc(%(unit)s, ''' + column + ''') AS bucket, SUM(entries) AS count
+                    FROM ''' + table + ''', bounds
+                    WHERE ''' + column + ''' >= bounds.first_bucket
+                    AND ''' + column + ''' < bounds.last_bucket + %(step)s::interval
+                    GROUP BY 1
                 )
-                SELECT 
-                    hours.hour,
-                    COUNT(vehicles.id) as count
-                FROM hours
-                LEFT JOIN vehicles ON 
-                    date_trunc('hour', vehicles.entry_time) = hours.hour
-                GROUP BY hours.hour
-                ORDER BY hours.hour
-            ''', (start_time, end_time))
+                SELECT buckets.bucket, COALESCE(counts.count, 0)
+                FROM buckets
+                LEFT JOIN counts ON counts.bucket = buckets.bucket
+                ORDER BY buckets.bucket
+            ''', {'unit': granularity, 'step': step, 'start': start_time, 'end': end_time})
             
             results = cursor.fetchall()
             return {
-                "labels": [row[0].strftime("%H:00") for row in results],
+                "labels": [row[0].strftime(label_format) for row in results],
                 "values": [row[1] for row in results]
             }
-        finally:
-            conn.close() 
\ No newline at end of file
+
+    def get_trends(self, period, count=12):
+        """Totals for the last ``count`` weeks or months, from the daily rollups.
+
+        Each row has entries, exits, payments, revenue, average dwell in
+        minutes and unauthorized attempts per gate.
+        """
+        if period not in TREND_PERIODS:
+            raise ValueError(f"Unknown trend period: {period}")
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                WITH periods AS (
+                    SELECT generate_series(
+                        date_trunc(%(unit)s, localtimestamp) - (%(count)s - 1) * ('1 ' || %(unit)s)::interval,
+                        date_trunc(%(unit)s, localtimestamp),
+                        ('1 ' || %(unit)s)::interval
+                    ) AS period
+                ),
+                totals AS (
+                    SELECT date_trunc(%(unit)s, day::timestamp) AS period,
+                           SUM(entries) AS entries, SUM(exits) AS exits,
+                           SUM(payments) AS payments, SUM(revenue) AS revenue,
+                           SUM(dwell_seconds) AS dwell_seconds
+                    FROM daily_stats
+                    WHERE day >= (SELECT MIN(period) FROM periods)
+                    GROUP BY 1
+                ),
+                gates AS (
+                    SELECT period, json_object_agg(gate_location, attempts) AS attempts
+                    FROM (
+                        SELECT date_trunc(%(unit)s, hour) AS period, gate_location, SUM(attempts) AS attempts
+                        FROM unauthorized_rollups
+                        WHERE hour >= (SELECT MIN(period) FROM periods)
+                        GROUP BY 1, 2
+                    ) per_gate
+                    GROUP BY period
+                )
+                SELECT periods.period,
+                       COALESCE(totals.entries, 0), COALESCE(totals.exits, 0),
+                       COALESCE(totals.payments, 0), COALESCE(totals.revenue, 0),
+                       totals.dwell_seconds / NULLIF(totals.exits, 0) / 60.0,
+                       COALESCE(gates.attempts, '{}')
+                FROM periods
+                LEFT JOIN totals ON totals.period = periods.period
+                LEFT JOIN gates ON gates.period = periods.period
+                ORDER BY periods.period
+            ''', {'unit': TREND_PERIODS[period], 'count': count})
+            
+            return [{
+                "period": row[0].date().isoformat(),
+                "entries": row[1],
+                "exits": row[2],
+                "payments": row[3],
+                "revenue": float(row[4]),
+                "avg_dwell_minutes": round(float(row[5]), 1) if row[5] is not None else None,
+                "unauthorized_by_gate": row[6]
+            } for row in cursor.fetchall()]
\ No newline at end of file
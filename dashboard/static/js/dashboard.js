@@ -154,7 +154,44 @@ function updateStats(data) {
     document.getElementById('occupancy-count').textContent = data.occupancy;
     document.getElementById('revenue').textContent = data.revenue.toLocaleString();
     document.getElementById('available-spaces').textContent = 50 - data.occupancy;
-    document.getElementById('unauthorized-count').textContent = data.unauthorized_attempts.length;
+    if (data.unauthorized_attempts) {
+        document.getElementById('unauthorized-count').textContent = data.unauthorized_attempts.length;
+    }
+}
+
+// Deltas pushed by the server: prepend one item and keep the list at 5
+const FEED_LIMIT = 5;
+let recentActivities = [];
+let unauthorizedAttempts = [];
+
+function addActivity(activity) {
+    recentActivities = [activity, ...recentActivities].slice(0, FEED_LIMIT);
+    updateRecentActivities(recentActivities);
+}
+
+function addUnauthorizedAttempt(attempt) {
+    unauthorizedAttempts = [attempt, ...unauthorizedAttempts].slice(0, FEED_LIMIT);
+    updateUnauthorizedAttempts(unauthorizedAttempts);
+    document.getElementById('unauthorized-count').textContent = unauthorizedAttempts.length;
+}
+
+// Count one entry in the hourly chart, rolling the window forward on a new hour
+function addHourlyEntry(timestamp) {
+    if (!hourlyChart) {
+        return;
+    }
+    const label = timestamp.substring(11, 13) + ':00';
+    const labels = hourlyChart.data.labels;
+    const values = hourlyChart.data.datasets[0].data;
+    if (labels[labels.length - 1] === label) {
+        values[values.length - 1] += 1;
+    } else {
+        labels.push(label);
+        values.push(1);
+        labels.shift();
+        values.shift();
+    }
+    hourlyChart.update();
 }
 
 // Fetch initial data
@@ -168,9 +205,11 @@ async function fetchInitialData() {
         const stats = await statsResponse.json();
         const hourlyData = await hourlyResponse.json();
 
+        recentActivities = stats.recent_activities;
+        unauthorizedAttempts = stats.unauthorized_attempts;
         updateStats(stats);
-        updateRecentActivities(stats.recent_activities);
-        updateUnauthorizedAttempts(stats.unauthorized_attempts);
+        updateRecentActivities(recentActivities);
+        updateUnauthorizedAttempts(unauthorizedAttempts);
         initHourlyChart(hourlyData);
     } catch (error) {
         console.error('Error fetching initial data:', error);
@@ -180,6 +219,8 @@ async function fetchInitialData() {
 // Socket.IO event handlers
 socket.on('connect', () => {
     console.log('Connected to server');
+    // Full snapshot on every (re)connect; after that the server pushes deltas
+    fetchInitialData();
 });
 
 socket.on('update', (data) => {
@@ -196,6 +237,18 @@ socket.on('update', (data) => {
         case 'hourly':
             initHourlyChart(data.data);
             break;
+        case 'activity':
+            addActivity(data.data);
+            break;
+        case 'unauthorized_attempt':
+            addUnauthorizedAttempt(data.data);
+            break;
+        case 'hourly_entry':
+            addHourlyEntry(data.data.timestamp);
+            break;
+        case 'refresh':
+            fetchInitialData();
+            break;
     }
 });
 
@@ -205,9 +258,5 @@ document.addEventListener('DOMContentLoaded', () => {
     updateCurrentTime();
     setInterval(updateCurrentTime, 1000);
 
-    // Fetch initial data
-    fetchInitialData();
-
-    // Refresh data every 30 seconds
-    setInterval(fetchInitialData, 30000);
+    // Data is fetched when the socket connects and then updated by server pushes
 }); 
\ No newline at end of file
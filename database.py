@@ -1,13 +1,46 @@
-import psycopg2
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
+import json
 import os
 from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+from db_pool import get_pool
+from parking_events import EVENT_CHANNEL
 
 # Load environment variables
 load_dotenv()
 
+# Gate lookups only consider sessions that entered within this many days, so
+# they touch the last few monthly partitions of vehicles instead of all of
+# them. An older open session (an abandoned car) is handled from the dashboard.
+OPEN_SESSION_DAYS = int(os.getenv('OPEN_SESSION_DAYS', '90'))
+# Repeated denials of the same plate at the same gate within this window
+# (a car waiting at the barrier) are logged once, whoever records them
+UNAUTHORIZED_DEDUP_SECONDS = float(os.getenv('UNAUTHORIZED_DEDUP_SECONDS', '30'))
+
+# Hot queries checked by ParkingDatabase.explain_hot_queries()
+HOT_QUERIES = {
+    'unpaid_entry': (
+        'SELECT entry_time FROM vehicles WHERE plate_number = %s AND payment_status = 0 '
+        "AND entry_time >= now() - %s * interval '1 day' ORDER BY entry_time DESC LIMIT 1",
+        ('RAA000A', OPEN_SESSION_DAYS)),
+    'paid_open_entry': (
+        'SELECT id FROM vehicles WHERE plate_number = %s AND payment_status = 1 '
+        "AND exit_time IS NULL AND entry_time >= now() - %s * interval '1 day' "
+        'ORDER BY entry_time DESC LIMIT 1', ('RAA000A', OPEN_SESSION_DAYS)),
+    'plate_history': (
+        'SELECT * FROM vehicles WHERE plate_number = %s ORDER BY entry_time DESC LIMIT 100',
+        ('RAA000A',)),
+    'occupancy': ('SELECT COUNT(*) FROM vehicles WHERE exit_time IS NULL', ()),
+    'daily_revenue': (
+        "SELECT COALESCE(SUM(payment_amount), 0) FROM vehicles WHERE payment_status = 1 "
+        "AND payment_time >= %s::date AND payment_time < %s::date + 1", ('2025-01-01', '2025-01-01')),
+    'unauthorized_feed': (
+        'SELECT * FROM unauthorized_exits ORDER BY timestamp DESC LIMIT 5', ()),
+}
+
 class ParkingDatabase:
-    def __init__(self):
+    def __init__(self, auto_migrate=None):
         self.conn_params = {
             'host': os.getenv('DB_HOST', 'localhost'),
             'port': os.getenv('DB_PORT', '5432'),
@@ -15,156 +48,422 @@ class ParkingDatabase:
             'user': os.getenv('DB_USER', 'postgres'),
             'password': os.getenv('DB_PASSWORD', 'agnes')
         }
-        self.init_db()
+        self.pool = get_pool(self.conn_params)
+        # Schema changes normally run once at deploy time (python migrations.py);
+        # set DB_AUTO_MIGRATE=1 to migrate on startup instead, e.g. in development
+        if auto_migrate is None:
+            auto_migrate = os.getenv('DB_AUTO_MIGRATE', '0') == '1'
+        if auto_migrate:
+            self.init_db()
 
     def get_connection(self):
-        """Create a new database connection"""
-        return psycopg2.connect(**self.conn_params)
+        """Borrow a pooled connection; use as ``with db.get_connection() as conn:``"""
+        return self.pool.connection()
 
     def init_db(self):
-        """Initialize the database with required tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Bring the schema up to date by applying pending migrations"""
+        from migrations import migrate
+        migrate(self)
 
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS vehicles (
-            id SERIAL PRIMARY KEY,
-            plate_number VARCHAR(10) NOT NULL,
-            entry_time TIMESTAMP NOT NULL,
-            exit_time TIMESTAMP,
-            payment_status INTEGER DEFAULT 0,
-            payment_amount DECIMAL(10,2),
-            payment_time TIMESTAMP
-        )
-        ''')
+    def explain_hot_queries(self):
+        """EXPLAIN every hot query and report which ones cannot use an index.
 
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS unauthorized_exits (
-            id SERIAL PRIMARY KEY,
-            plate_number VARCHAR(10) NOT NULL,
-            timestamp TIMESTAMP NOT NULL,
-            gate_location VARCHAR(10) NOT NULL
-        )
-        ''')
-
-        conn.commit()
-        conn.close()
-
-    def add_vehicle_entry(self, plate_number):
+        Sequential scans are disabled for the check, so a tiny table does not
+        hide a missing index. Returns {query name: (uses_index, plan nodes)}.
+        """
+        report = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, (sql, params) in HOT_QUERIES.items():
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                plan = cursor.fetchone()[0][0]['Plan']
+                nodes = list(_plan_nodes(plan))
+                uses_index = not any(node == 'Seq Scan' for node, _ in nodes)
+                report[name] = (uses_index, nodes)
+            conn.rollback()
+        return report
+
+    def rebuild_stats(self, start=None, end=None):
+        """Recompute the occupancy counter and rollups from the session rows"""
+        from rollups import backfill
+        backfill(self, start, end)
+
+    def add_vehicle_entry(self, plate_number, entry_time=None, op_id=None):
         """Record a new vehicle entry"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT INTO vehicles (plate_number, entry_time)
-        VALUES (%s, %s)
-        ''', (plate_number, datetime.now()))
-        conn.commit()
-        conn.close()
+        self.add_vehicle_entries([(plate_number, entry_time or datetime.now(), op_id)])
+
+    def add_vehicle_entries(self, entries):
+        """Record many entries in one transaction -> number inserted.
+
+        ``entries`` is a list of (plate, entry_time, op_id); rows whose op_id
+        was already applied are skipped. One multi-row INSERT, one counter
+        update per hour touched and one NOTIFY statement for the batch.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            entries = _claim_ops(cursor, entries)
+            if not entries:
+                conn.rollback()
+                return 0
+            execute_values(cursor, '''
+            INSERT INTO vehicles (plate_number, entry_time) VALUES %s
+            ''', [(plate, when) for plate, when, _ in entries])
+            occupancy = len(entries)
+            for hour, count in _count_by_hour(when for _, when, _ in entries).items():
+                _bump_stats(cursor, hour, entries=count, occupancy=occupancy)
+                occupancy = 0
+            _notify_many(cursor, [
+                dict(type='entry', plate_number=plate, timestamp=when.isoformat())
+                for plate, when, _ in entries])
+            conn.commit()
+        return len(entries)
+
+    def get_open_sessions(self):
+        """Latest open session of every plate inside -> [(plate, entry_time, paid)]"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT DISTINCT ON (plate_number) plate_number, entry_time, payment_status = 1
+            FROM vehicles
+            WHERE exit_time IS NULL AND entry_time >= %s
+            ORDER BY plate_number, entry_time DESC
+            ''', (_open_since(),))
+            return cursor.fetchall()
+
+    def prune_applied_ops(self, days=30):
+        """Forget journal operation ids older than ``days``; replays never go back that far"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            DELETE FROM applied_ops WHERE applied_at < now() - %s * interval '1 day'
+            ''', (days,))
+            conn.commit()
 
     def get_unpaid_entry(self, plate_number):
         """Get the most recent unpaid entry for a vehicle"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-        SELECT entry_time FROM vehicles
-        WHERE plate_number = %s AND payment_status = 0
-        ORDER BY entry_time DESC LIMIT 1
-        ''', (plate_number,))
-        result = cursor.fetchone()
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT entry_time FROM vehicles
+            WHERE plate_number = %s AND payment_status = 0 AND entry_time >= %s
+            ORDER BY entry_time DESC LIMIT 1
+            ''', (plate_number, _open_since()))
+            result = cursor.fetchone()
         return result[0] if result else None
 
-    def update_payment(self, plate_number, amount, payment_time=None):
+    def update_payment(self, plate_number, amount, payment_time=None, op_id=None):
         """Update payment status and amount for a vehicle (latest unpaid entry only)"""
         if payment_time is None:
             payment_time = datetime.now()
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-        WITH unpaid AS (
-            SELECT id FROM vehicles
-            WHERE plate_number = %s AND payment_status = 0
-            ORDER BY entry_time DESC
-            LIMIT 1
-        )
-        UPDATE vehicles
-        SET payment_status = 1,
-            payment_amount = %s,
-            payment_time = %s
-        WHERE id IN (SELECT id FROM unpaid)
-        ''', (plate_number, amount, payment_time))
-        conn.commit()
-        conn.close()
-
-    def record_unauthorized_exit(self, plate_number, gate_location):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if not _claim_op(cursor, op_id):
+                conn.rollback()
+                return None
+            cursor.execute('''
+            WITH unpaid AS (
+                SELECT id, entry_time FROM vehicles
+                WHERE plate_number = %s AND payment_status = 0 AND entry_time >= %s
+                ORDER BY entry_time DESC
+                LIMIT 1
+            )
+            UPDATE vehicles
+            SET payment_status = 1,
+                payment_amount = %s,
+                payment_time = %s
+            WHERE (id, entry_time) IN (SELECT id, entry_time FROM unpaid)
+            ''', (plate_number, _open_since(), amount, payment_time))
+            if cursor.rowcount:
+                _bump_stats(cursor, payment_time, payments=1, revenue=amount)
+                _notify(cursor, 'payment', plate_number, payment_time, amount=float(amount))
+            conn.commit()
+
+    def record_unauthorized_exit(self, plate_number, gate_location, timestamp=None, op_id=None):
         """Record an unauthorized exit attempt"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT INTO unauthorized_exits (plate_number, timestamp, gate_location)
-        VALUES (%s, %s, %s)
-        ''', (plate_number, datetime.now(), gate_location))
-        conn.commit()
-        conn.close()
+        self.record_unauthorized_exits([(plate_number, gate_location, timestamp or datetime.now(), op_id)])
+
+    def record_unauthorized_exits(self, attempts):
+        """Record many unauthorized attempts in one transaction -> number inserted.
+
+        ``attempts`` is a list of (plate, gate_location, timestamp, op_id);
+        rows whose op_id was already applied are skipped, and so are repeats
+        of a plate at a gate within UNAUTHORIZED_DEDUP_SECONDS of a logged
+        attempt (in this batch or already in the table).
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            attempts = _first_denials(_claim_ops(cursor, attempts))
+            if not attempts:
+                conn.rollback()
+                return 0
+            # execute_values allows a single placeholder, so the window is part of the SQL
+            inserted = execute_values(cursor, f'''
+            INSERT INTO unauthorized_exits (plate_number, gate_location, timestamp)
+            SELECT attempt.plate, attempt.gate, attempt.ts
+            FROM (VALUES %s) AS attempt (plate, gate, ts)
+            WHERE NOT EXISTS ({_RECENT_DENIAL.format(
+                plate='attempt.plate', gate='attempt.gate', when='attempt.ts')})
+            RETURNING plate_number, gate_location, timestamp
+            ''', [(plate, gate, when) for plate, gate, when, _ in attempts], fetch=True)
+            per_gate = Counter((_hour(when), gate) for _, gate, when in inserted)
+            for (hour, gate), count in per_gate.items():
+                _bump_unauthorized(cursor, hour, gate, count)
+            if inserted:
+                _notify_many(cursor, [
+                    dict(type='unauthorized', plate_number=plate, timestamp=when.isoformat(), gate_location=gate)
+                    for plate, gate, when in inserted])
+            conn.commit()
+        return len(inserted)
 
     def get_vehicle_history(self, plate_number=None, limit=100):
-        """Get vehicle entry/exit history"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        if plate_number:
-            cursor.execute('''
-            SELECT * FROM vehicles
-            WHERE plate_number = %s
-            ORDER BY entry_time DESC LIMIT %s
-            ''', (plate_number, limit))
-        else:
-            cursor.execute('''
-            SELECT * FROM vehicles
-            ORDER BY entry_time DESC LIMIT %s
-            ''', (limit,))
-        results = cursor.fetchall()
-        conn.close()
+        """Get vehicle entry/exit history, including archived sessions"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if plate_number:
+                cursor.execute('''
+                SELECT * FROM vehicles_all
+                WHERE plate_number = %s
+                ORDER BY entry_time DESC LIMIT %s
+                ''', (plate_number, limit))
+            else:
+                cursor.execute('''
+                SELECT * FROM vehicles_all
+                ORDER BY entry_time DESC LIMIT %s
+                ''', (limit,))
+            results = cursor.fetchall()
         return results
 
     def get_unauthorized_exits(self, limit=100):
         """Get unauthorized exit attempts"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-        SELECT * FROM unauthorized_exits
-        ORDER BY timestamp DESC LIMIT %s
-        ''', (limit,))
-        results = cursor.fetchall()
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT * FROM unauthorized_exits
+            ORDER BY timestamp DESC LIMIT %s
+            ''', (limit,))
+            results = cursor.fetchall()
         return results
 
     def get_paid_entry_without_exit(self, plate_number):
         """Check if the vehicle has a paid entry without exit recorded"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-        SELECT id FROM vehicles
-        WHERE plate_number = %s AND payment_status = 1 AND exit_time IS NULL
-        ORDER BY entry_time DESC LIMIT 1
-        ''', (plate_number,))
-        result = cursor.fetchone()
-        conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT id FROM vehicles
+            WHERE plate_number = %s AND payment_status = 1 AND exit_time IS NULL
+              AND entry_time >= %s
+            ORDER BY entry_time DESC LIMIT 1
+            ''', (plate_number, _open_since()))
+            result = cursor.fetchone()
         return result[0] if result else None
 
     def update_exit_time(self, plate_number):
         """Update the exit time for the most recent paid entry"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        now = datetime.now()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            WITH target AS (
+                SELECT id, entry_time FROM vehicles
+                WHERE plate_number = %s AND payment_status = 1 AND exit_time IS NULL
+                  AND entry_time >= %s
+                ORDER BY entry_time DESC
+                LIMIT 1
+            )
+            UPDATE vehicles
+            SET exit_time = %s
+            WHERE (id, entry_time) IN (SELECT id, entry_time FROM target)
+            RETURNING entry_time
+            ''', (plate_number, _open_since(), now))
+            exited = cursor.fetchone()
+            if exited:
+                _bump_stats(cursor, now, exits=1, occupancy=-1, dwell=now - exited[0])
+                _notify(cursor, 'exit', plate_number, now)
+            conn.commit()
+
+    def authorize_exit(self, plate_number, gate_location, exit_time=None, op_id=None, deny=True):
+        """Atomically close the latest paid open session, or log an unauthorized attempt.
+
+        One statement, one round trip: the paid entry is row-locked, so two
+        gates can never both exit it. Returns True when the exit is allowed.
+        With ``deny=False`` (replaying an exit a gate already allowed) a
+        missing session only returns False; no attempt is logged.
+        """
+        now = exit_time or datetime.now()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if not _claim_op(cursor, op_id):
+                conn.rollback()
+                return None
+            cursor.execute('''
+            WITH target AS (
+                SELECT id, entry_time FROM vehicles
+                WHERE plate_number = %(plate)s AND payment_status = 1 AND exit_time IS NULL
+                  AND entry_time >= %(since)s
+                ORDER BY entry_time DESC
+                LIMIT 1
+                FOR UPDATE
+            ),
+            exited AS (
+                UPDATE vehicles
+                SET exit_time = %(now)s
+                WHERE (id, entry_time) IN (SELECT id, entry_time FROM target)
+                RETURNING id, entry_time
+            ),
+            denied AS (
+                INSERT INTO unauthorized_exits (plate_number, timestamp, gate_location)
+                SELECT %(plate)s, %(now)s, %(gate)s
+                WHERE %(deny)s AND NOT EXISTS (SELECT 1 FROM exited)
+                  AND NOT EXISTS ({recent_denial})
+                RETURNING id
+            )
+            SELECT (SELECT id FROM exited), (SELECT entry_time FROM exited), (SELECT id FROM denied)
+            '''.format(recent_denial=_RECENT_DENIAL.format(
+                plate='%(plate)s', gate='%(gate)s', when='%(now)s::timestamp')),
+            {'plate': plate_number, 'now': now, 'gate': gate_location, 'deny': deny,
+             'since': _open_since()})
+            exited_id, entry_time, denied_id = cursor.fetchone()
+            if exited_id is not None:
+                _bump_stats(cursor, now, exits=1, occupancy=-1, dwell=now - entry_time)
+                _notify(cursor, 'exit', plate_number, now, gate_location=gate_location)
+            elif denied_id is not None:
+                _bump_unauthorized(cursor, now, gate_location)
+                _notify(cursor, 'unauthorized', plate_number, now, gate_location=gate_location)
+            conn.commit()
+        return exited_id is not None
+
+
+def _claim_op(cursor, op_id):
+    """False when this journaled operation was already applied (a replay after a crash)"""
+    if op_id is None:
+        return True
+    cursor.execute('''
+    INSERT INTO applied_ops (op_id) VALUES (%s) ON CONFLICT DO NOTHING
+    ''', (op_id,))
+    return cursor.rowcount == 1
+
+
+def _claim_ops(cursor, rows):
+    """Keep the rows (op_id last) whose operation was not applied before"""
+    op_ids = [row[-1] for row in rows if row[-1] is not None]
+    if not op_ids:
+        return rows
+    claimed = execute_values(cursor, '''
+    INSERT INTO applied_ops (op_id) VALUES %s ON CONFLICT DO NOTHING RETURNING op_id
+    ''', [(op_id,) for op_id in op_ids], fetch=True)
+    claimed = {row[0] for row in claimed}
+    return [row for row in rows if row[-1] is None or row[-1] in claimed]
+
+
+# A denial of {plate} at {gate} already logged within the dedup window before {when}
+_RECENT_DENIAL = f'''
+    SELECT 1 FROM unauthorized_exits logged
+    WHERE logged.plate_number = {{plate}} AND logged.gate_location = {{gate}}
+      AND logged.timestamp > {{when}} - {UNAUTHORIZED_DEDUP_SECONDS!r} * interval '1 second'
+      AND logged.timestamp <= {{when}}
+'''
+
+
+def _first_denials(attempts, window=UNAUTHORIZED_DEDUP_SECONDS):
+    """Drop attempts that repeat an earlier one of the same batch (plate, gate) within ``window``"""
+    last_logged = {}
+    kept = []
+    for attempt in sorted(attempts, key=lambda attempt: attempt[2]):
+        plate, gate, when = attempt[:3]
+        last = last_logged.get((plate, gate))
+        if last is None or (when - last).total_seconds() >= window:
+            last_logged[(plate, gate)] = when
+            kept.append(attempt)
+    return kept
+
+
+def _open_since():
+    """Oldest entry_time a gate lookup considers; a literal, so partitions prune at plan time"""
+    return datetime.now() - timedelta(days=OPEN_SESSION_DAYS)
+
+
+def _hour(when):
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def _count_by_hour(times):
+    return Counter(_hour(when) for when in times)
+
+
+def _bump_stats(cursor, when, entries=0, exits=0, payments=0, revenue=0, occupancy=0, dwell=None):
+    """Apply one write's deltas to the counter and rollups, inside the caller's transaction"""
+    if occupancy:
         cursor.execute('''
-        WITH target AS (
-            SELECT id FROM vehicles
-            WHERE plate_number = %s AND payment_status = 1 AND exit_time IS NULL
-            ORDER BY entry_time DESC
-            LIMIT 1
-        )
-        UPDATE vehicles
-        SET exit_time = %s
-        WHERE id IN (SELECT id FROM target)
-        ''', (plate_number, datetime.now()))
-        conn.commit()
-        conn.close()
+        UPDATE parking_counters SET occupancy = occupancy + %s, updated_at = %s
+        ''', (occupancy, when))
+    deltas = {
+        'when': when, 'entries': entries, 'exits': exits, 'payments': payments,
+        'revenue': revenue, 'dwell': int(dwell.total_seconds()) if dwell else 0
+    }
+    cursor.execute('''
+    WITH hourly AS (
+        INSERT INTO hourly_rollups (hour, entries, exits, payments, revenue, dwell_seconds)
+        VALUES (date_trunc('hour', %(when)s::timestamp), %(entries)s, %(exits)s,
+                %(payments)s, %(revenue)s, %(dwell)s)
+        ON CONFLICT (hour) DO UPDATE SET
+            entries = hourly_rollups.entries + EXCLUDED.entries,
+            exits = hourly_rollups.exits + EXCLUDED.exits,
+            payments = hourly_rollups.payments + EXCLUDED.payments,
+            revenue = hourly_rollups.revenue + EXCLUDED.revenue,
+            dwell_seconds = hourly_rollups.dwell_seconds + EXCLUDED.dwell_seconds
+    )
+    INSERT INTO daily_stats (day, entries, exits, payments, revenue, dwell_seconds)
+    VALUES (%(when)s::date, %(entries)s, %(exits)s, %(payments)s, %(revenue)s, %(dwell)s)
+    ON CONFLICT (day) DO UPDATE SET
+        entries = daily_stats.entries + EXCLUDED.entries,
+        exits = daily_stats.exits + EXCLUDED.exits,
+        payments = daily_stats.payments + EXCLUDED.payments,
+        revenue = daily_stats.revenue + EXCLUDED.revenue,
+        dwell_seconds = daily_stats.dwell_seconds + EXCLUDED.dwell_seconds
+    ''', deltas)
+
+
+def _bump_unauthorized(cursor, when, gate_location, count=1):
+    """Count unauthorized exit attempts in the per-gate and daily rollups"""
+    cursor.execute('''
+    WITH hourly AS (
+        INSERT INTO unauthorized_rollups (hour, gate_location, attempts)
+        VALUES (date_trunc('hour', %(when)s::timestamp), %(gate)s, %(count)s)
+        ON CONFLICT (hour, gate_location) DO UPDATE SET
+            attempts = unauthorized_rollups.attempts + EXCLUDED.attempts
+    )
+    INSERT INTO daily_stats (day, unauthorized)
+    VALUES (%(when)s::date, %(count)s)
+    ON CONFLICT (day) DO UPDATE SET unauthorized = daily_stats.unauthorized + EXCLUDED.unauthorized
+    ''', {'when': when, 'gate': gate_location, 'count': count})
+
+
+def _notify(cursor, event_type, plate_number, when, **extra):
+    """Queue a parking event; Postgres delivers it to listeners only if the transaction commits"""
+    payload = dict(type=event_type, plate_number=plate_number, timestamp=when.isoformat(), **extra)
+    cursor.execute('SELECT pg_notify(%s, %s)', (EVENT_CHANNEL, json.dumps(payload)))
+
+
+def _notify_many(cursor, events):
+    """Queue several parking events with one statement, in order"""
+    cursor.execute('''
+    SELECT pg_notify(%s, payload)
+    FROM unnest(%s::text[]) WITH ORDINALITY AS events(payload, position)
+    ORDER BY position
+    ''', (EVENT_CHANNEL, [json.dumps(event) for event in events]))
+
+
+def _plan_nodes(plan):
+    """Yield (node type, relation or index name) for every node of an EXPLAIN plan"""
+    yield plan['Node Type'], plan.get('Index Name') or plan.get('Relation Name')
+    for child in plan.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+if __name__ == '__main__':
+    # python database.py -> check that every hot query can use an index
+    db = ParkingDatabase()
+    for name, (uses_index, nodes) in db.explain_hot_queries().items():
+        status = 'OK  ' if uses_index else 'SEQ '
+        print(f"{status} {name}: " + ', '.join(f"{node} ({target})" for node, target in nodes))
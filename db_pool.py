@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the wait timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of long-lived PostgreSQL connections.
+
+    Connections are handed out through ``connection()``, checked with a cheap
+    ``SELECT 1`` when they have been idle for a while, and replaced
+    transparently when the server dropped them.
+    """
+
+    def __init__(self, conn_params, minconn=1, maxconn=10, timeout=5.0,
+                 health_check_interval=30.0, connect_retries=3):
+        self.conn_params = dict(conn_params)
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.connect_retries = connect_retries
+
+        self._idle = []  # list of (connection, last_used_monotonic)
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        for _ in range(minconn):
+            try:
+                self._idle.append((self._connect(), time.monotonic()))
+            except psycopg2.OperationalError as e:
+                # Database not reachable yet; connections are opened lazily
+                print(f"[DB POOL] Warm-up failed: {e}")
+                break
+
+    def _connect(self):
+        """Open a new connection, retrying with backoff on transient failures"""
+        delay = 0.2
+        for attempt in range(self.connect_retries):
+            try:
+                return psycopg2.connect(**self.conn_params)
+            except psycopg2.OperationalError:
+                if attempt == self.connect_retries - 1:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def _is_healthy(self, conn, last_used):
+        """Check a pooled connection before handing it out"""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self):
+        """Check a connection out of the pool, blocking while the pool is exhausted"""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.maxconn:
+                    conn, last_used = None, None
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+        # Connecting and health checks happen outside the lock so a slow
+        # server never blocks other threads returning connections
+        try:
+            if conn is not None and not self._is_healthy(conn, last_used):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+            return conn
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, resetting any open transaction"""
+        if not discard and not conn.closed:
+            try:
+                status = conn.get_transaction_status()
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        else:
+            discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a ``with`` block.
+
+        Broken connections (dropped by the server, network errors) are closed
+        instead of being returned, so the next checkout reconnects.
+        """
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard or conn.closed)
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._idle.clear()
+            self._cond.notify_all()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(conn_params):
+    """Return the process-wide pool for these connection parameters"""
+    key = tuple(sorted(conn_params.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                conn_params,
+                minconn=int(os.getenv('DB_POOL_MIN', '1')),
+                maxconn=int(os.getenv('DB_POOL_MAX', '10')),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+            )
+            _pools[key] = pool
+        return pool
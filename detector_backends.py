@@ -0,0 +1,231 @@
+import glob
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Plate detector backends with one interface: detect_batch(frames) returns
+# (x1, y1, x2, y2) integer boxes per frame, in frame coordinates.
+#   torch     ultralytics + PyTorch on YOLO_MODEL_PATH (best.pt)
+#   onnx      ONNX Runtime on best.onnx / best_int8.onnx
+#   openvino  OpenVINO on best_openvino_model/ / best_int8_openvino_model/
+# The exported models come from export_detector.py. DETECTOR_BACKEND picks
+# the backend and DETECTOR_MODEL_PATH overrides the file it loads. OpenVINO
+# is optional: pip install openvino (and nncf for INT8 export).
+DETECTOR_BACKEND = os.getenv('DETECTOR_BACKEND', 'torch')
+DETECTOR_MODEL_PATH = os.getenv('DETECTOR_MODEL_PATH')
+DETECTOR_INT8 = os.getenv('DETECTOR_INT8', '0') == '1'
+IMAGE_SIZE = int(os.getenv('DETECTOR_IMAGE_SIZE', '640'))
+
+# ultralytics predict() defaults, so every backend returns the same boxes
+IOU_THRESHOLD = 0.7
+MAX_DETECTIONS = 300
+PAD_VALUE = 114
+
+
+def default_model_path(backend, int8=False):
+    """Where export_detector.py writes (and backends look for) each model"""
+    from plate_recognition import MODEL_PATH
+
+    base = os.path.splitext(MODEL_PATH)[0]
+    suffix = '_int8' if int8 else ''
+    if backend == 'torch':
+        return MODEL_PATH
+    if backend == 'onnx':
+        return f"{base}{suffix}.onnx"
+    if backend == 'openvino':
+        return f"{base}{suffix}_openvino_model"
+    raise ValueError(f"Unknown detector backend: {backend}")
+
+
+def letterbox(frame, size=IMAGE_SIZE):
+    """Resize keeping aspect ratio and pad to size x size -> (image, scale, (pad_x, pad_y))"""
+    height, width = frame.shape[:2]
+    scale = min(size / height, size / width)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+    canvas = np.full((size, size, 3), PAD_VALUE, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = cv2.resize(
+        frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    return canvas, scale, (pad_x, pad_y)
+
+
+def to_blob(images):
+    """Letterboxed BGR images -> float32 NCHW RGB batch in [0, 1]"""
+    batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+
+def decode_yolov8(output, conf, iou=IOU_THRESHOLD, max_det=MAX_DETECTIONS):
+    """One image's raw YOLOv8 head (4 + classes, anchors) -> [(x1, y1, x2, y2, score)] after NMS"""
+    predictions = output.T
+    class_scores = predictions[:, 4:]
+    classes = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(classes)), classes]
+    keep = scores > conf
+    if not keep.any():
+        return []
+    centers, sizes = predictions[keep, :2], predictions[keep, 2:4]
+    scores, classes = scores[keep], classes[keep]
+    # Offset boxes by class so one NMS pass never suppresses across classes
+    offsets = classes[:, None] * 7680.0
+    corners = np.concatenate([centers - sizes / 2 + offsets, sizes], axis=1)
+    indices = cv2.dnn.NMSBoxes(corners.tolist(), scores.tolist(), conf, iou)
+    indices = np.array(indices).reshape(-1)[:max_det]
+    detections = []
+    for index in indices:
+        (cx, cy), (w, h) = centers[index], sizes[index]
+        detections.append((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2, float(scores[index])))
+    return detections
+
+
+def unletterbox(detections, scale, pad, shape):
+    """Map letterboxed boxes back onto the original frame, clipped, as int tuples"""
+    height, width = shape[:2]
+    pad_x, pad_y = pad
+    boxes = []
+    for x1, y1, x2, y2, _ in detections:
+        x1 = min(max((x1 - pad_x) / scale, 0), width)
+        x2 = min(max((x2 - pad_x) / scale, 0), width)
+        y1 = min(max((y1 - pad_y) / scale, 0), height)
+        y2 = min(max((y2 - pad_y) / scale, 0), height)
+        boxes.append((int(x1), int(y1), int(x2), int(y2)))
+    return boxes
+
+
+class Detector(ABC):
+    """Base class: a plate model that turns frames into boxes"""
+
+    name = None
+
+    def __init__(self, model_path, conf=0.25, image_size=IMAGE_SIZE):
+        self.model_path = model_path
+        self.conf = conf
+        self.image_size = image_size
+
+    @abstractmethod
+    def detect_batch(self, frames, conf=None):
+        """Boxes for each frame -> list of [(x1, y1, x2, y2), ...]"""
+
+    def detect(self, frame, conf=None):
+        return self.detect_batch([frame], conf)[0]
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.model_path!r})"
+
+
+class TorchDetector(Detector):
+    """The trained .pt model through ultralytics / PyTorch"""
+
+    name = 'torch'
+
+    def __init__(self, model_path, conf=0.25, image_size=IMAGE_SIZE):
+        super().__init__(model_path, conf, image_size)
+        from plate_recognition import get_model
+        self.model = get_model(model_path)
+
+    def detect_batch(self, frames, conf=None):
+        from plate_recognition import result_boxes
+
+        results = self.model(list(frames), conf=conf or self.conf, verbose=False)
+        return [result_boxes(result) for result in results]
+
+
+class ExportedDetector(Detector):
+    """Exported YOLOv8 graph: letterbox, one forward pass, decode + NMS in numpy"""
+
+    @abstractmethod
+    def _forward(self, blob):
+        """NCHW float32 batch -> raw YOLOv8 head output, one row per image"""
+
+    def detect_batch(self, frames, conf=None):
+        if not len(frames):
+            return []
+        conf = conf or self.conf
+        boxed = [letterbox(frame, self.image_size) for frame in frames]
+        outputs = self._forward(to_blob([image for image, _, _ in boxed]))
+        return [
+            unletterbox(decode_yolov8(output, conf), scale, pad, frame.shape)
+            for output, (_, scale, pad), frame in zip(outputs, boxed, frames)
+        ]
+
+
+class OnnxDetector(ExportedDetector):
+    """best.onnx (fp32 or INT8) through ONNX Runtime on the CPU"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path, conf=0.25, image_size=IMAGE_SIZE, threads=None):
+        super().__init__(model_path, conf, image_size)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _forward(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVinoDetector(ExportedDetector):
+    """An OpenVINO IR (directory or .xml, fp32 or INT8) on the CPU plugin"""
+
+    name = 'openvino'
+
+    def __init__(self, model_path, conf=0.25, image_size=IMAGE_SIZE):
+        super().__init__(model_path, conf, image_size)
+        from openvino import Core, PartialShape
+
+        xml_path = model_path
+        if os.path.isdir(model_path):
+            xml_path = glob.glob(os.path.join(model_path, '*.xml'))[0]
+        core = Core()
+        model = core.read_model(xml_path)
+        # IRs exported without dynamic=True take exactly one image per request
+        model.reshape(PartialShape([-1, 3, image_size, image_size]))
+        self.compiled = core.compile_model(model, 'CPU')
+        self.output = self.compiled.output(0)
+        # An infer request is not thread-safe; callers may share the detector
+        self.lock = threading.Lock()
+
+    def _forward(self, blob):
+        with self.lock:
+            return self.compiled([blob])[self.output]
+
+
+BACKENDS = {cls.name: cls for cls in (TorchDetector, OnnxDetector, OpenVinoDetector)}
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def create_detector(backend=None, model_path=None, int8=None, **options):
+    """A new detector; defaults come from DETECTOR_BACKEND / DETECTOR_MODEL_PATH / DETECTOR_INT8"""
+    backend = backend or DETECTOR_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown detector backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    int8 = DETECTOR_INT8 if int8 is None else int8
+    model_path = model_path or DETECTOR_MODEL_PATH or default_model_path(backend, int8)
+    if backend != 'torch' and not os.path.exists(model_path):
+        raise FileNotFoundError(f"No {backend} model at {model_path}; run export_detector.py first")
+    return BACKENDS[backend](model_path, **options)
+
+
+def get_detector(backend=None, model_path=None):
+    """Load a detector once per process and share it, like get_model()"""
+    key = (backend or DETECTOR_BACKEND, model_path)
+    with _detectors_lock:
+        detector = _detectors.get(key)
+        if detector is None:
+            detector = create_detector(*key)
+            print(f"[DETECTOR] Using {detector.name} backend: {detector.model_path}")
+            _detectors[key] = detector
+        return detector
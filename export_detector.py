@@ -0,0 +1,118 @@
+import glob
+import os
+import shutil
+import sys
+
+import cv2
+from dotenv import load_dotenv
+
+from detector_backends import IMAGE_SIZE, default_model_path, letterbox, to_blob
+from plate_recognition import MODEL_PATH
+
+load_dotenv()
+
+# Export the trained plate model for the CPU backends in detector_backends.py:
+#   python export_detector.py onnx [--int8]
+#   python export_detector.py openvino [--int8]
+# --int8 quantizes the exported model with calibration images from
+# dataset/val/images (CALIBRATION_DIR), up to CALIBRATION_IMAGES of them.
+CALIBRATION_DIR = os.getenv('CALIBRATION_DIR', os.path.join('dataset', 'val', 'images'))
+CALIBRATION_IMAGES = int(os.getenv('CALIBRATION_IMAGES', '300'))
+
+
+def calibration_blobs(directory=CALIBRATION_DIR, limit=CALIBRATION_IMAGES, image_size=IMAGE_SIZE):
+    """Letterboxed 1-image batches, preprocessed exactly like inference input"""
+    paths = sorted(glob.glob(os.path.join(directory, '*.jpg')) +
+                   glob.glob(os.path.join(directory, '*.png')))[:limit]
+    blobs = []
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is not None:
+            blobs.append(to_blob([letterbox(frame, image_size)[0]]))
+    if not blobs:
+        raise ValueError(f"No calibration images in {directory}")
+    if len(blobs) < 100:
+        print(f"[EXPORT] Only {len(blobs)} calibration image(s); INT8 accuracy may suffer")
+    return blobs
+
+
+def export_onnx(image_size=IMAGE_SIZE):
+    """best.pt -> best.onnx (fp32, dynamic batch)"""
+    from ultralytics import YOLO
+
+    target = default_model_path('onnx')
+    exported = YOLO(MODEL_PATH).export(format='onnx', imgsz=image_size, dynamic=True, simplify=True)
+    if exported and os.path.abspath(exported) != os.path.abspath(target):
+        shutil.move(exported, target)
+    print(f"[EXPORT] ONNX model written to {target}")
+    return target
+
+
+def quantize_onnx(source, image_size=IMAGE_SIZE):
+    """best.onnx -> best_int8.onnx by static QDQ quantization on the calibration set"""
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+
+    class Reader(CalibrationDataReader):
+        def __init__(self, input_name, blobs):
+            self.batches = iter({input_name: blob} for blob in blobs)
+
+        def get_next(self):
+            return next(self.batches, None)
+
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(source, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    target = default_model_path('onnx', int8=True)
+    quantize_static(source, target, Reader(input_name, calibration_blobs(image_size=image_size)),
+                    quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    print(f"[EXPORT] INT8 ONNX model written to {target}")
+    return target
+
+
+def export_openvino(image_size=IMAGE_SIZE):
+    """best.pt -> best_openvino_model/ (fp32 IR, dynamic batch)"""
+    from ultralytics import YOLO
+
+    target = default_model_path('openvino')
+    exported = YOLO(MODEL_PATH).export(format='openvino', imgsz=image_size, dynamic=True)
+    if exported and os.path.abspath(exported) != os.path.abspath(target):
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.move(exported, target)
+    print(f"[EXPORT] OpenVINO model written to {target}")
+    return target
+
+
+def quantize_openvino(source, image_size=IMAGE_SIZE):
+    """best_openvino_model/ -> best_int8_openvino_model/ with NNCF post-training quantization"""
+    import nncf
+    from openvino import Core, PartialShape, save_model
+
+    xml_path = glob.glob(os.path.join(source, '*.xml'))[0]
+    model = Core().read_model(xml_path)
+    # Keep the batch dimension dynamic so the INT8 IR batches like the fp32 one
+    model.reshape(PartialShape([-1, 3, image_size, image_size]))
+    dataset = nncf.Dataset(calibration_blobs(image_size=image_size))
+    quantized = nncf.quantize(model, dataset, preset=nncf.QuantizationPreset.MIXED,
+                              subset_size=CALIBRATION_IMAGES)
+    target = default_model_path('openvino', int8=True)
+    os.makedirs(target, exist_ok=True)
+    save_model(quantized, os.path.join(target, os.path.basename(xml_path)), compress_to_fp16=False)
+    print(f"[EXPORT] INT8 OpenVINO model written to {target}")
+    return target
+
+
+EXPORTERS = {
+    'onnx': (export_onnx, quantize_onnx),
+    'openvino': (export_openvino, quantize_openvino),
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in EXPORTERS:
+        print(f"Usage: python export_detector.py {{{'|'.join(EXPORTERS)}}} [--int8]")
+        sys.exit(1)
+    export, quantize = EXPORTERS[sys.argv[1]]
+    path = export()
+    if '--int8' in sys.argv:
+        quantize(path)
@@ -0,0 +1,178 @@
+import os
+import queue
+import threading
+import time
+
+import serial
+import serial.tools.list_ports
+
+# Single-byte commands understood by the barrier Arduino
+OPEN = 'open'
+CLOSE = 'close'
+ALARM = 'alarm'
+COMMAND_BYTES = {OPEN: b'1', CLOSE: b'0', ALARM: b'2'}
+
+PORT_KEYWORDS = ('Arduino', 'USB-SERIAL', 'CH340', 'COM12')
+
+
+def detect_arduino_port(keywords=PORT_KEYWORDS):
+    """Find the barrier Arduino; GATE_SERIAL_PORT in .env overrides detection"""
+    if os.getenv('GATE_SERIAL_PORT'):
+        return os.getenv('GATE_SERIAL_PORT')
+    ports = list(serial.tools.list_ports.comports())
+    for port in ports:
+        if any(keyword in (port.description or '') for keyword in keywords):
+            return port.device
+    for port in ports:
+        if "COM" in port.device:
+            return port.device
+    return None
+
+
+def open_arduino(port=None, baud_rate=9600, settle_seconds=2):
+    """Open the gate serial link, or return None when no Arduino is attached"""
+    port = port or detect_arduino_port()
+    if not port:
+        print("[ARDUINO] Arduino not detected.")
+        return None
+    try:
+        link = serial.Serial(port, baud_rate, timeout=1)
+    except serial.SerialException as e:
+        print(f"[ARDUINO] Failed to connect to {port}: {e}")
+        return None
+    # The board resets when the port opens; give it time to boot
+    time.sleep(settle_seconds)
+    print(f"[ARDUINO] Connected to {port}")
+    return link
+
+
+class FakeSerial:
+    """In-memory stand-in for serial.Serial, for tests and dry runs without hardware"""
+
+    def __init__(self):
+        self.written = []
+        self.closed = False
+
+    def write(self, data):
+        self.written.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class GateCommand:
+    """A queued gate action; ``wait()`` blocks until the controller has sent it"""
+
+    def __init__(self, action, hold_seconds=None, generation=None):
+        self.action = action
+        self.hold_seconds = hold_seconds
+        self.generation = generation  # set on auto-close commands only
+        self.done = threading.Event()
+        self.ok = None
+        self.error = None
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return bool(self.ok)
+
+
+class GateController(threading.Thread):
+    """Owns the barrier serial link and executes commands from a queue.
+
+    ``open()``, ``close()`` and ``alarm()`` return immediately with a
+    ``GateCommand``; a worker thread writes to the serial port and marks
+    the command done. An open gate closes itself after ``hold_seconds``
+    unless another open extends it. Without an Arduino a ``FakeSerial``
+    is used so detection can run unattended.
+    """
+
+    def __init__(self, link=None, hold_seconds=15, name='Gate'):
+        super().__init__(daemon=True, name=name)
+        self.link = link if link is not None else FakeSerial()
+        self.hold_seconds = hold_seconds
+        self.commands = queue.Queue()
+        self.state = CLOSE
+        self.close_timer = None
+        self.generation = 0  # bumped on every open so stale auto-closes are ignored
+        self.start()
+
+    def submit(self, action, hold_seconds=None, generation=None):
+        command = GateCommand(action, hold_seconds, generation)
+        self.commands.put(command)
+        return command
+
+    def open(self, hold_seconds=None):
+        return self.submit(OPEN, hold_seconds)
+
+    def close(self):
+        return self.submit(CLOSE)
+
+    def alarm(self):
+        return self.submit(ALARM)
+
+    def _schedule_close(self, hold_seconds):
+        if self.close_timer:
+            self.close_timer.cancel()
+        self.close_timer = threading.Timer(
+            hold_seconds, self.submit, args=(CLOSE,), kwargs={'generation': self.generation})
+        self.close_timer.daemon = True
+        self.close_timer.start()
+
+    def _execute(self, command):
+        if command.action == OPEN:
+            if self.state != OPEN:
+                self._send(OPEN)
+                print(f"[GATE] {self.name}: opening gate")
+            else:
+                # Another car while the gate is up: keep it open longer
+                print(f"[GATE] {self.name}: already open, extending")
+            self.state = OPEN
+            self.generation += 1
+            self._schedule_close(command.hold_seconds or self.hold_seconds)
+        elif command.action == CLOSE:
+            if command.generation is not None and command.generation != self.generation:
+                return  # auto-close from an open that has since been extended
+            if self.close_timer:
+                self.close_timer.cancel()
+                self.close_timer = None
+            self._send(CLOSE)
+            self.state = CLOSE
+            print(f"[GATE] {self.name}: closing gate")
+        elif command.action == ALARM:
+            self._send(ALARM)
+            print(f"[ALERT] {self.name}: triggering buzzer")
+        else:
+            raise ValueError(f"Unknown gate command: {command.action}")
+
+    def _send(self, action):
+        self.link.write(COMMAND_BYTES[action])
+        self.link.flush()
+
+    def run(self):
+        while True:
+            command = self.commands.get()
+            if command is None:
+                break
+            try:
+                self._execute(command)
+                command.ok = True
+            except (serial.SerialException, OSError, ValueError) as e:
+                command.ok = False
+                command.error = e
+                print(f"[GATE] {self.name}: {command.action} failed: {e}")
+            finally:
+                command.done.set()
+
+    def shutdown(self, close_gate=True):
+        """Optionally close the barrier, stop the worker and release the port"""
+        if close_gate:
+            self.close()
+        self.commands.put(None)
+        self.join(timeout=5)
+        if self.close_timer:
+            self.close_timer.cancel()
+        self.link.close()
@@ -0,0 +1,217 @@
+import glob
+import os
+import queue
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# A batch is run as soon as MAX_BATCH frames are waiting, or MAX_LATENCY_MS
+# after its first frame arrived, whichever comes first
+MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', '8'))
+MAX_LATENCY_MS = float(os.getenv('INFERENCE_MAX_LATENCY_MS', '20'))
+
+
+class BatchStats:
+    """Running totals for the batches of one size"""
+
+    __slots__ = ('batches', 'frames', 'infer_seconds', 'wait_seconds', 'max_latency')
+
+    def __init__(self):
+        self.batches = 0
+        self.frames = 0
+        self.infer_seconds = 0.0  # forward passes only
+        self.wait_seconds = 0.0   # summed per frame: queueing before the pass
+        self.max_latency = 0.0    # worst submit -> result time of any frame
+
+    def as_dict(self):
+        per_frame = self.frames or 1
+        return {
+            'batches': self.batches,
+            'frames': self.frames,
+            'fps': round(self.frames / self.infer_seconds, 1) if self.infer_seconds else None,
+            'infer_ms': round(1000 * self.infer_seconds / (self.batches or 1), 2),
+            'mean_latency_ms': round(1000 * (self.wait_seconds / per_frame +
+                                             self.infer_seconds / (self.batches or 1)), 2),
+            'max_latency_ms': round(1000 * self.max_latency, 2),
+        }
+
+
+class InferenceService(threading.Thread):
+    """Runs the plate detector for many callers in micro-batches.
+
+    ``detect(frame)`` may be called from any thread (one per camera lane).
+    Frames are queued; the service thread takes up to ``max_batch`` of them,
+    waiting at most ``max_latency_ms`` after the oldest one arrived, runs
+    them through the model in one forward pass and hands each caller its
+    own boxes. Only this thread touches the model, a
+    ``detector_backends.Detector`` (default: ``get_detector()``).
+
+    Pass it as ``PlateRecognizer(detector=...)`` to route a recognizer's
+    detection through the service. ``stats()`` reports throughput and
+    latency per batch size. ``start()`` loads the model and raises if that
+    fails; if the service thread dies anyway, every waiting and later
+    request fails instead of blocking.
+    """
+
+    def __init__(self, model=None, conf=0.25, max_batch=MAX_BATCH,
+                 max_latency_ms=MAX_LATENCY_MS, name='inference'):
+        super().__init__(daemon=True, name=name)
+        self._model = model
+        self.conf = conf
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000.0
+        self.requests = queue.Queue()
+        self.stats_lock = threading.Lock()
+        self.batch_stats = defaultdict(BatchStats)
+        self.running = True
+
+    @property
+    def model(self):
+        if self._model is None:
+            from detector_backends import get_detector
+            self._model = get_detector()
+        return self._model
+
+    def start(self):
+        # Load in the caller's thread so a bad model path fails loudly here
+        self.model
+        super().start()
+
+    def submit(self, frame):
+        """Queue a frame -> Future resolving to its list of boxes"""
+        if not self.running:
+            raise RuntimeError(f"{self.name} is stopped")
+        future = Future()
+        self.requests.put((frame, future, time.monotonic()))
+        if not self.running:
+            # Stopped meanwhile: the loop may already have drained the queue
+            self._fail_pending(RuntimeError(f"{self.name} is stopped"))
+        return future
+
+    def detect(self, frame, timeout=None):
+        """Plate boxes (x1, y1, x2, y2) for one frame, run as part of a batch"""
+        return self.submit(frame).result(timeout)
+
+    def _collect(self):
+        """Block for the first request, then gather more until full or due"""
+        first = self.requests.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = first[2] + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self.requests.get(timeout=remaining) if remaining > 0 else \
+                    self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self.running = False
+                break
+            batch.append(request)
+        return batch
+
+    def run(self):
+        error = RuntimeError(f"{self.name} stopped")
+        try:
+            model = self.model
+            while self.running:
+                batch = self._collect()
+                if not batch:
+                    break
+                frames = [frame for frame, _, _ in batch]
+                started = time.monotonic()
+                try:
+                    results = model.detect_batch(frames, self.conf)
+                except Exception as e:
+                    print(f"[INFERENCE] Batch of {len(batch)} failed: {e}")
+                    for _, future, _ in batch:
+                        future.set_exception(e)
+                    continue
+                finished = time.monotonic()
+                for (_, future, _), boxes in zip(batch, results):
+                    future.set_result(boxes)
+                self._record(batch, started, finished)
+        except Exception as e:
+            print(f"[INFERENCE] {self.name} stopped: {e}")
+            error = e
+        finally:
+            # Nothing will serve what is still queued
+            self.running = False
+            self._fail_pending(error)
+
+    def _fail_pending(self, error):
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and not request[1].done():
+                request[1].set_exception(error)
+
+    def _record(self, batch, started, finished):
+        with self.stats_lock:
+            stats = self.batch_stats[len(batch)]
+            stats.batches += 1
+            stats.frames += len(batch)
+            stats.infer_seconds += finished - started
+            stats.wait_seconds += sum(started - queued for _, _, queued in batch)
+            stats.max_latency = max(stats.max_latency,
+                                    max(finished - queued for _, _, queued in batch))
+
+    def stats(self):
+        """{batch size: {batches, frames, fps, infer_ms, mean_latency_ms, max_latency_ms}}"""
+        with self.stats_lock:
+            return {size: stats.as_dict() for size, stats in sorted(self.batch_stats.items())}
+
+    def report(self):
+        """The stats as a printable table"""
+        lines = [f"{'batch':>5} {'batches':>8} {'frames':>8} {'fps':>8} "
+                 f"{'infer ms':>9} {'mean lat ms':>12} {'max lat ms':>11}"]
+        for size, row in self.stats().items():
+            lines.append(f"{size:>5} {row['batches']:>8} {row['frames']:>8} {row['fps'] or '-':>8} "
+                         f"{row['infer_ms']:>9} {row['mean_latency_ms']:>12} {row['max_latency_ms']:>11}")
+        return '\n'.join(lines)
+
+    def stop(self):
+        self.running = False
+        self.requests.put(None)
+
+
+def benchmark(images, batch_sizes=(1, 2, 4, 8), rounds=5):
+    """Throughput and latency of the detector at each batch size, on sample images"""
+    import cv2
+
+    frames = [cv2.imread(path) for path in images]
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        raise ValueError("no readable images to benchmark with")
+    from detector_backends import get_detector
+    model = get_detector()
+    model.detect_batch(frames[:1])  # warm-up
+    for size in batch_sizes:
+        # Callers submit all at once, so every batch fills to ``size``
+        service = InferenceService(model, max_batch=size, max_latency_ms=1000)
+        service.start()
+        for _ in range(rounds):
+            pending = [service.submit(frames[i % len(frames)]) for i in range(size * len(frames))]
+            for future in pending:
+                future.result()
+        service.stop()
+        service.join()
+        for row in service.stats().values():
+            print(f"[BENCH] batch {size}: {row['fps']} frames/s, "
+                  f"{row['infer_ms']} ms per pass, mean latency {row['mean_latency_ms']} ms")
+
+
+if __name__ == '__main__':
+    # python inference_service.py [image ...]  (default: dataset/val/images)
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join('dataset', 'val', 'images', '*.jpg')))
+    benchmark(paths)
@@ -0,0 +1,146 @@
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import yaml
+from dotenv import load_dotenv
+
+from database import ParkingDatabase
+from gate_controller import GateController, open_arduino
+from inference_service import MAX_BATCH, InferenceService
+from lanes import LANE_ROLES
+from partitions import check_partitions
+from pipeline import DetectionPipeline, FrameGrabber, draw_boxes
+from plate_recognition import PlateRecognizer
+from session_store import SessionStore
+
+load_dotenv()
+
+# Every lane of a site in one process: one camera, pipeline and gate per
+# lane, but one YOLO model (fed in micro-batches by an InferenceService),
+# one OCR pool and one session store for all of them (so an exit sees an
+# entry from another lane immediately).
+#
+#   python lane_runner.py [lanes.yaml] [--show]
+LANES_CONFIG = os.getenv('LANES_CONFIG', 'lanes.yaml')
+OCR_WORKERS = int(os.getenv('LANE_OCR_WORKERS', str(min(8, os.cpu_count() or 2))))
+# Exit lanes store their location in unauthorized_exits.gate_location
+GATE_LOCATION_LENGTH = 10
+
+
+def camera_source(value):
+    """Device index for digit strings, otherwise a file path or stream URL"""
+    return int(value) if str(value).isdigit() else value
+
+
+def load_lanes(path=LANES_CONFIG):
+    """Read and check the lane list from a YAML config file"""
+    with open(path, encoding='utf-8') as f:
+        lanes = (yaml.safe_load(f) or {}).get('lanes') or []
+    names = set()
+    for lane in lanes:
+        for key in ('name', 'role', 'camera'):
+            if key not in lane:
+                raise ValueError(f"{path}: lane {lane} has no '{key}'")
+        if lane['role'] not in LANE_ROLES:
+            raise ValueError(f"{path}: lane {lane['name']} has unknown role {lane['role']!r}")
+        location = lane.get('location') or ''
+        if lane['role'] == 'exit' and len(location) > GATE_LOCATION_LENGTH:
+            raise ValueError(f"{path}: lane {lane['name']} location {location!r} is longer "
+                             f"than {GATE_LOCATION_LENGTH} characters")
+        if lane['name'] in names:
+            raise ValueError(f"{path}: lane name {lane['name']!r} is used twice")
+        names.add(lane['name'])
+    if not lanes:
+        raise ValueError(f"{path}: no lanes configured")
+    return lanes
+
+
+class Lane:
+    """Camera, detection pipeline, barrier and entry/exit policy of one lane"""
+
+    def __init__(self, config, recognizer, sessions, ocr_pool):
+        self.name = config['name']
+        # Without an explicit port the lane runs on a FakeSerial; auto-detection
+        # would hand the same Arduino to every lane
+        link = open_arduino(config['serial_port']) if config.get('serial_port') else None
+        self.gate = GateController(link, hold_seconds=config.get('hold_seconds', 15), name=self.name)
+        role = LANE_ROLES[config['role']]
+        options = {'location': config['location']} if config.get('location') else {}
+        for key in ('cooldown', 'recheck_seconds'):
+            if key in config:
+                options[key] = config[key]
+        self.handler = role(sessions, self.gate, **options)
+        self.grabber = FrameGrabber(camera_source(config['camera']), name=self.name)
+        self.pipeline = DetectionPipeline(self.grabber, recognizer, ocr_pool=ocr_pool)
+
+    def start(self):
+        self.pipeline.start()
+        print(f"[LANE] {self.name}: {self.handler.role} lane at {self.handler.location}")
+
+    def poll(self):
+        """Act on every plate committed since the last call"""
+        while True:
+            try:
+                decision = self.pipeline.events.get_nowait()
+            except queue.Empty:
+                return
+            print(f"[VALID] {self.name}: plate detected {decision.plate} "
+                  f"({decision.reads} reads, agreement {decision.agreement:.0%})")
+            if not self.handler.handle(decision.plate) and self.handler.recheck_seconds:
+                self.pipeline.tracker.recheck(decision.track_id, self.handler.recheck_seconds)
+
+    def stop(self):
+        self.pipeline.stop()
+        self.gate.shutdown()
+
+
+def run(config_path=LANES_CONFIG, show=False):
+    configs = load_lanes(config_path)
+    db = ParkingDatabase()
+    # Partitions are created by the scheduled `python partitions.py` job; only warn here
+    check_partitions(db)
+    sessions = SessionStore(db, 'lanes').start()
+    # Each lane has at most one frame in flight, so batches never exceed the lane count
+    detector = InferenceService(max_batch=min(len(configs), MAX_BATCH))
+    detector.start()
+    recognizer = PlateRecognizer(detector=detector)
+    ocr_pool = ThreadPoolExecutor(max_workers=OCR_WORKERS)
+    lanes = [Lane(config, recognizer, sessions, ocr_pool) for config in configs]
+    for lane in lanes:
+        lane.start()
+    print(f"[SYSTEM] {len(lanes)} lane(s) ready. Press Ctrl+C to stop"
+          f"{' (or q in a window)' if show else ''}.")
+
+    try:
+        while any(lane.grabber.running for lane in lanes):
+            for lane in lanes:
+                lane.poll()
+            if show:
+                for lane in lanes:
+                    frame, boxes = lane.pipeline.latest
+                    if frame is not None:
+                        cv2.imshow(lane.name, draw_boxes(frame, boxes))
+                if cv2.waitKey(30) & 0xFF == ord('q'):
+                    break
+            else:
+                time.sleep(0.03)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for lane in lanes:
+            lane.stop()
+        ocr_pool.shutdown(wait=False)
+        detector.stop()
+        print(f"[INFERENCE] Detection batches:\n{detector.report()}")
+        sessions.stop()
+        if show:
+            cv2.destroyAllWindows()
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    run(args[0] if args else LANES_CONFIG, show='--show' in sys.argv)
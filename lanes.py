@@ -0,0 +1,72 @@
+import time
+
+# Gate decisions for one lane, shared by car_entry.py, car_exit.py and
+# lane_runner.py. ``sessions`` is a SessionStore (or anything with the same
+# methods) and ``gate`` a GateController. When ``handle`` refuses a car and
+# the lane has ``recheck_seconds``, the caller asks the tracker to decide
+# that car again after that long (PlateTracker.recheck) while it is in view.
+
+
+class EntryLane:
+    """Records the entry and raises the barrier for every new car.
+
+    A plate read again within ``cooldown`` seconds of its last entry on this
+    lane (the same car still in front of the camera) is skipped.
+    """
+
+    role = 'entry'
+    recheck_seconds = None  # a skipped repeat read needs no second look
+
+    def __init__(self, sessions, gate, location='Main Entrance', cooldown=300):
+        self.sessions = sessions
+        self.gate = gate
+        self.location = location
+        self.cooldown = cooldown
+        self.last_plate = None
+        self.last_entry_time = 0
+
+    def handle(self, plate):
+        """Act on a committed plate -> True if the gate was opened"""
+        now = time.time()
+        if plate == self.last_plate and now - self.last_entry_time <= self.cooldown:
+            print(f"[SKIPPED] {self.location}: {plate} already entered within "
+                  f"{self.cooldown // 60} min")
+            return False
+
+        # Journaled locally, reaches the database in the background
+        self.sessions.add_vehicle_entry(plate)
+        print(f"[SAVED] {self.location}: {plate} entry recorded.")
+        self.gate.open()
+        self.last_plate = plate
+        self.last_entry_time = now
+        return True
+
+
+class ExitLane:
+    """Opens for a paid session, sounds the alarm (and logs the attempt) otherwise.
+
+    A refused car is checked again every ``recheck_seconds`` while it waits,
+    so paying at the kiosk lets it out without driving off and back.
+    """
+
+    role = 'exit'
+
+    def __init__(self, sessions, gate, location='Main Exit', recheck_seconds=10):
+        self.sessions = sessions
+        self.gate = gate
+        self.location = location
+        self.recheck_seconds = recheck_seconds
+
+    def handle(self, plate):
+        """Act on a committed plate -> True if the gate was opened"""
+        # Closes the session, or records the unauthorized attempt, without a DB round trip
+        if self.sessions.authorize_exit(plate, self.location):
+            print(f"[ACCESS GRANTED] {self.location}: payment complete for {plate}")
+            self.gate.open()
+            return True
+        print(f"[ACCESS DENIED] {self.location}: payment NOT complete for {plate}")
+        self.gate.alarm()
+        return False
+
+
+LANE_ROLES = {lane.role: lane for lane in (EntryLane, ExitLane)}
@@ -0,0 +1,290 @@
+import sys
+from datetime import datetime
+
+from partitions import ARCHIVE_TABLESPACE, PARTITIONS_AHEAD, add_months, ensure_partitions, month_start
+from rollups import backfill_cursor
+
+# Versioned schema migrations for the parking database. Run once per deploy
+# (python migrations.py); gate scripts and dashboard workers then start
+# without issuing any DDL. Each migration runs in its own transaction and is
+# recorded in schema_version.
+
+# Arbitrary key for pg_advisory_lock so two deploys never migrate at once
+MIGRATION_LOCK_ID = 72_450_001
+
+# Indexes on vehicles. Created by migration 2 and again on the partitioned
+# table by migration 3, where Postgres cascades them to every partition.
+VEHICLE_INDEXES = [
+    # get_unpaid_entry / update_payment: latest unpaid session of a plate
+    '''CREATE INDEX IF NOT EXISTS idx_vehicles_unpaid_by_plate
+       ON vehicles (plate_number, entry_time DESC) WHERE payment_status = 0''',
+    # authorize_exit: latest paid open session of a plate
+    '''CREATE INDEX IF NOT EXISTS idx_vehicles_paid_open_by_plate
+       ON vehicles (plate_number, entry_time DESC)
+       WHERE payment_status = 1 AND exit_time IS NULL''',
+    # get_vehicle_history for one plate
+    '''CREATE INDEX IF NOT EXISTS idx_vehicles_plate_entry
+       ON vehicles (plate_number, entry_time DESC)''',
+    # history without a plate, hourly statistics, entry feed
+    'CREATE INDEX IF NOT EXISTS idx_vehicles_entry_time ON vehicles (entry_time DESC)',
+    # current occupancy
+    'CREATE INDEX IF NOT EXISTS idx_vehicles_open ON vehicles (entry_time) WHERE exit_time IS NULL',
+    # exit feed
+    '''CREATE INDEX IF NOT EXISTS idx_vehicles_exit_time
+       ON vehicles (exit_time DESC) WHERE exit_time IS NOT NULL''',
+    # daily revenue (range on payment_time) and payment feed
+    '''CREATE INDEX IF NOT EXISTS idx_vehicles_payment_time
+       ON vehicles (payment_time DESC) WHERE payment_status = 1''',
+]
+
+
+def _partition_vehicles(cursor):
+    """Rebuild vehicles as a table range-partitioned by month of entry_time.
+
+    The primary key becomes (id, entry_time) because a partitioned table's
+    unique keys must include the partition column; ids keep coming from the
+    same sequence. Existing rows are copied into monthly partitions and the
+    old table is dropped.
+    """
+    cursor.execute('ALTER TABLE vehicles RENAME TO vehicles_unpartitioned')
+    cursor.execute('ALTER SEQUENCE vehicles_id_seq OWNED BY NONE')
+    cursor.execute('''
+    CREATE TABLE vehicles (
+        id INTEGER NOT NULL DEFAULT nextval('vehicles_id_seq'),
+        plate_number VARCHAR(10) NOT NULL,
+        entry_time TIMESTAMP NOT NULL,
+        exit_time TIMESTAMP,
+        payment_status INTEGER DEFAULT 0,
+        payment_amount DECIMAL(10,2),
+        payment_time TIMESTAMP,
+        PRIMARY KEY (id, entry_time)
+    ) PARTITION BY RANGE (entry_time)
+    ''')
+    cursor.execute('ALTER SEQUENCE vehicles_id_seq OWNED BY vehicles.id')
+
+    cursor.execute('SELECT MIN(entry_time) FROM vehicles_unpartitioned')
+    oldest = cursor.fetchone()[0] or datetime.now()
+    this_month = month_start(datetime.now())
+    ensure_partitions(cursor, month_start(oldest), add_months(this_month, PARTITIONS_AHEAD))
+    cursor.execute('CREATE TABLE vehicles_default PARTITION OF vehicles DEFAULT')
+
+    cursor.execute('INSERT INTO vehicles SELECT * FROM vehicles_unpartitioned')
+    cursor.execute('DROP TABLE vehicles_unpartitioned')
+    for statement in VEHICLE_INDEXES:
+        cursor.execute(statement)
+
+    # Closed, paid sessions moved out by partitions.archive_closed_sessions
+    tablespace = f' TABLESPACE {ARCHIVE_TABLESPACE}' if ARCHIVE_TABLESPACE else ''
+    cursor.execute(f'''
+    CREATE TABLE vehicles_archive (LIKE vehicles INCLUDING DEFAULTS){tablespace}
+    ''')
+    cursor.execute(f'''
+    CREATE INDEX idx_vehicles_archive_plate_entry
+    ON vehicles_archive (plate_number, entry_time DESC){tablespace}
+    ''')
+    cursor.execute('''
+    CREATE VIEW vehicles_all AS
+    SELECT * FROM vehicles
+    UNION ALL
+    SELECT * FROM vehicles_archive
+    ''')
+
+
+# Seeds the summary tables from the session rows in migration 4. The lock
+# makes concurrent writers wait, so no increment is lost or counted twice.
+# Later rebuilds go through rollups.backfill().
+STATS_REBUILD = [
+    'LOCK TABLE parking_counters, daily_stats IN EXCLUSIVE MODE',
+    'DELETE FROM daily_stats',
+    '''
+    INSERT INTO daily_stats (day, entries, exits, payments, revenue)
+    SELECT day, SUM(entries), SUM(exits), SUM(payments), SUM(revenue)
+    FROM (
+        SELECT entry_time::date AS day, 1 AS entries, 0 AS exits, 0 AS payments, 0 AS revenue
+        FROM vehicles_all
+        UNION ALL
+        SELECT exit_time::date, 0, 1, 0, 0
+        FROM vehicles_all WHERE exit_time IS NOT NULL
+        UNION ALL
+        SELECT payment_time::date, 0, 0, 1, payment_amount
+        FROM vehicles_all WHERE payment_status = 1 AND payment_time IS NOT NULL
+    ) events
+    GROUP BY day
+    ''',
+    '''
+    UPDATE parking_counters
+    SET occupancy = (SELECT COUNT(*) FROM vehicles WHERE exit_time IS NULL),
+        updated_at = now()
+    ''',
+]
+
+
+# (version, description, steps). A step is an SQL string or a callable
+# taking a cursor, for migrations that need logic.
+MIGRATIONS = [
+    (1, 'vehicles and unauthorized_exits tables', [
+        '''
+        CREATE TABLE IF NOT EXISTS vehicles (
+            id SERIAL PRIMARY KEY,
+            plate_number VARCHAR(10) NOT NULL,
+            entry_time TIMESTAMP NOT NULL,
+            exit_time TIMESTAMP,
+            payment_status INTEGER DEFAULT 0,
+            payment_amount DECIMAL(10,2),
+            payment_time TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS unauthorized_exits (
+            id SERIAL PRIMARY KEY,
+            plate_number VARCHAR(10) NOT NULL,
+            timestamp TIMESTAMP NOT NULL,
+            gate_location VARCHAR(10) NOT NULL
+        )
+        ''',
+    ]),
+    (2, 'indexes for gate and dashboard hot queries', VEHICLE_INDEXES + [
+        '''CREATE INDEX IF NOT EXISTS idx_unauthorized_exits_timestamp
+           ON unauthorized_exits (timestamp DESC)''',
+        # Index versions are tracked by migrations from now on
+        'DROP TABLE IF EXISTS schema_indexes',
+    ]),
+    (3, 'partition vehicles by month of entry_time, add vehicles_archive', [
+        _partition_vehicles,
+    ]),
+    (4, 'occupancy counter and daily_stats summary tables', [
+        # Single-row table: the number of vehicles currently inside
+        '''
+        CREATE TABLE parking_counters (
+            id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+            occupancy INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT now()
+        )
+        ''',
+        'INSERT INTO parking_counters DEFAULT VALUES',
+        # Per-day totals; entries/exits by event date, revenue by payment date
+        '''
+        CREATE TABLE daily_stats (
+            day DATE PRIMARY KEY,
+            entries INTEGER NOT NULL DEFAULT 0,
+            exits INTEGER NOT NULL DEFAULT 0,
+            payments INTEGER NOT NULL DEFAULT 0,
+            revenue DECIMAL(12,2) NOT NULL DEFAULT 0
+        )
+        ''',
+    ] + STATS_REBUILD),
+    (5, 'hourly rollups, unauthorized attempts per gate, dwell in daily_stats', [
+        '''
+        CREATE TABLE hourly_rollups (
+            hour TIMESTAMP PRIMARY KEY,
+            entries INTEGER NOT NULL DEFAULT 0,
+            exits INTEGER NOT NULL DEFAULT 0,
+            payments INTEGER NOT NULL DEFAULT 0,
+            revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+            dwell_seconds BIGINT NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE unauthorized_rollups (
+            hour TIMESTAMP NOT NULL,
+            gate_location VARCHAR(10) NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, gate_location)
+        )
+        ''',
+        # Summed exit dwell; average dwell is dwell_seconds / exits
+        'ALTER TABLE daily_stats ADD COLUMN dwell_seconds BIGINT NOT NULL DEFAULT 0',
+        'ALTER TABLE daily_stats ADD COLUMN unauthorized INTEGER NOT NULL DEFAULT 0',
+        backfill_cursor,
+    ]),
+    (6, 'applied_ops for idempotent replay of gate journals', [
+        '''
+        CREATE TABLE applied_ops (
+            op_id VARCHAR(32) PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL DEFAULT now()
+        )
+        ''',
+    ]),
+]
+
+
+def _ensure_version_table(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT now()
+    )
+    ''')
+
+
+def current_version(db):
+    """Highest applied migration, or 0 for an empty database"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT to_regclass('schema_version')")
+        if cursor.fetchone()[0] is None:
+            return 0
+        cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+        return cursor.fetchone()[0]
+
+
+def migrate(db, target=None):
+    """Apply every pending migration up to ``target`` (default: latest).
+
+    Returns the list of versions applied.
+    """
+    applied = []
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_ID,))
+        try:
+            _ensure_version_table(cursor)
+            conn.commit()
+            cursor.execute('SELECT version FROM schema_version')
+            done = {row[0] for row in cursor.fetchall()}
+            conn.commit()
+
+            for version, description, steps in MIGRATIONS:
+                if version in done or (target is not None and version > target):
+                    continue
+                print(f"[MIGRATE] {version}: {description}")
+                try:
+                    for step in steps:
+                        if callable(step):
+                            step(cursor)
+                        else:
+                            cursor.execute(step)
+                    cursor.execute(
+                        'INSERT INTO schema_version (version, description) VALUES (%s, %s)',
+                        (version, description))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    print(f"[MIGRATE] {version} failed; rolled back")
+                    raise
+                applied.append(version)
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_ID,))
+            conn.commit()
+    return applied
+
+
+def latest_version():
+    return MIGRATIONS[-1][0]
+
+
+if __name__ == '__main__':
+    # python migrations.py           -> apply pending migrations
+    # python migrations.py --status  -> show current and latest version
+    from database import ParkingDatabase
+
+    db = ParkingDatabase()
+    if '--status' in sys.argv:
+        print(f"[MIGRATE] Schema at version {current_version(db)} (latest {latest_version()})")
+    else:
+        versions = migrate(db)
+        if versions:
+            print(f"[MIGRATE] Applied {len(versions)} migration(s); now at {versions[-1]}")
+        else:
+            print(f"[MIGRATE] Already up to date (version {current_version(db)})")
@@ -0,0 +1,59 @@
+import time
+
+import cv2
+
+
+class MotionGate:
+    """Cheap frame-difference check that decides whether YOLO needs to run.
+
+    Frames are shrunk to ``width`` pixels, blurred and compared against a
+    slowly updated background. Detection runs while more than
+    ``min_changed`` of the pixels differ, and for ``hold_seconds`` after
+    motion stops so a car that just pulled up still gets read.
+    """
+
+    def __init__(self, width=160, pixel_threshold=25, min_changed=0.01,
+                 hold_seconds=2.0, learning_rate=0.05):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.hold_seconds = hold_seconds
+        self.learning_rate = learning_rate
+        self.background = None
+        self.last_motion = float('-inf')
+        self.skipped = 0
+        self.checked = 0
+
+    def _small_gray(self, frame):
+        height, width = frame.shape[:2]
+        scale = self.width / float(width)
+        small = cv2.resize(frame, (self.width, max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0).astype('float32')
+
+    def motion_ratio(self, frame):
+        """Fraction of pixels that changed against the background model"""
+        gray = self._small_gray(frame)
+        if self.background is None:
+            self.background = gray
+            return 1.0
+        diff = cv2.absdiff(gray, self.background)
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+        changed = (diff > self.pixel_threshold).mean()
+        return float(changed)
+
+    def should_run(self, frame, busy=False, now=None):
+        """True when the frame is worth running detection on.
+
+        ``busy`` forces detection, e.g. while a tracked plate is still
+        being read.
+        """
+        now = time.monotonic() if now is None else now
+        self.checked += 1
+        if self.motion_ratio(frame) >= self.min_changed:
+            self.last_motion = now
+        if busy or now - self.last_motion <= self.hold_seconds:
+            return True
+        self.skipped += 1
+        return False
@@ -0,0 +1,311 @@
+import ctypes
+import ctypes.util
+import os
+import threading
+
+import cv2
+import numpy as np
+import pytesseract
+
+# Tesseract enums from tesseract/publictypes.h
+OEM_DEFAULT = 3
+PSM_SINGLE_BLOCK = 6
+PSM_SINGLE_WORD = 8
+RIL_WORD = 3
+
+# Geometry of the mosaic used for batched OCR
+TILE_HEIGHT = 64
+TILE_GAP = 32
+
+# Candidate shared library names (Linux/macOS, then the UB-Mannheim Windows build)
+LIBRARY_NAMES = ['tesseract', 'libtesseract-5', 'libtesseract-4', 'libtesseract']
+
+
+def _load_libtesseract():
+    """Find and load libtesseract, or return None when it is not installed"""
+    candidates = []
+    if os.getenv('TESSERACT_LIB'):
+        candidates.append(os.getenv('TESSERACT_LIB'))
+    tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+    if os.path.isabs(tesseract_cmd):
+        # The Windows installer ships the DLL next to tesseract.exe
+        install_dir = os.path.dirname(tesseract_cmd)
+        candidates += [os.path.join(install_dir, f'{name}.dll') for name in LIBRARY_NAMES]
+    candidates += [ctypes.util.find_library(name) for name in LIBRARY_NAMES]
+
+    for path in candidates:
+        if not path:
+            continue
+        try:
+            lib = ctypes.CDLL(path)
+        except OSError:
+            continue
+        _declare_signatures(lib)
+        return lib
+    return None
+
+
+def _declare_signatures(lib):
+    handle = ctypes.c_void_p
+    lib.TessBaseAPICreate.restype = handle
+    lib.TessBaseAPIDelete.argtypes = [handle]
+    lib.TessBaseAPIEnd.argtypes = [handle]
+    lib.TessBaseAPIInit2.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+    lib.TessBaseAPIInit2.restype = ctypes.c_int
+    lib.TessBaseAPISetPageSegMode.argtypes = [handle, ctypes.c_int]
+    lib.TessBaseAPISetVariable.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p]
+    lib.TessBaseAPISetVariable.restype = ctypes.c_int
+    lib.TessBaseAPISetImage.argtypes = [handle, ctypes.c_void_p, ctypes.c_int,
+                                        ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    lib.TessBaseAPISetSourceResolution.argtypes = [handle, ctypes.c_int]
+    lib.TessBaseAPIGetUTF8Text.argtypes = [handle]
+    lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+    lib.TessBaseAPIMeanTextConf.argtypes = [handle]
+    lib.TessBaseAPIMeanTextConf.restype = ctypes.c_int
+    lib.TessBaseAPIClear.argtypes = [handle]
+    lib.TessBaseAPIRecognize.argtypes = [handle, ctypes.c_void_p]
+    lib.TessBaseAPIRecognize.restype = ctypes.c_int
+    lib.TessBaseAPIGetIterator.argtypes = [handle]
+    lib.TessBaseAPIGetIterator.restype = ctypes.c_void_p
+    lib.TessResultIteratorGetPageIterator.argtypes = [ctypes.c_void_p]
+    lib.TessResultIteratorGetPageIterator.restype = ctypes.c_void_p
+    lib.TessResultIteratorGetUTF8Text.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.TessResultIteratorGetUTF8Text.restype = ctypes.c_void_p
+    lib.TessResultIteratorConfidence.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.TessResultIteratorConfidence.restype = ctypes.c_float
+    lib.TessResultIteratorNext.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.TessResultIteratorNext.restype = ctypes.c_int
+    lib.TessResultIteratorDelete.argtypes = [ctypes.c_void_p]
+    int_p = ctypes.POINTER(ctypes.c_int)
+    lib.TessPageIteratorBoundingBox.argtypes = [ctypes.c_void_p, ctypes.c_int,
+                                                int_p, int_p, int_p, int_p]
+    lib.TessPageIteratorBoundingBox.restype = ctypes.c_int
+    lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+
+
+def build_mosaic(images, tile_height=TILE_HEIGHT, gap=TILE_GAP):
+    """Stack grayscale crops vertically on a white canvas for one OCR pass.
+
+    Returns the mosaic and the (top, bottom) row span of every tile so that
+    recognised words can be mapped back to the crop they came from.
+    """
+    tiles = []
+    for image in images:
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height, width = image.shape[:2]
+        new_width = max(1, int(round(width * tile_height / float(height))))
+        tiles.append(cv2.resize(image, (new_width, tile_height), interpolation=cv2.INTER_LINEAR))
+
+    width = max(tile.shape[1] for tile in tiles) + 2 * gap
+    height = len(tiles) * (tile_height + gap) + gap
+    mosaic = np.full((height, width), 255, dtype=np.uint8)
+    spans = []
+    top = gap
+    for tile in tiles:
+        mosaic[top:top + tile_height, gap:gap + tile.shape[1]] = tile
+        spans.append((top, top + tile_height))
+        top += tile_height + gap
+    return mosaic, spans
+
+
+def group_words_by_tile(words, spans):
+    """Turn [(text, conf, top, bottom), ...] into one (text, conf) per tile"""
+    grouped = [[] for _ in spans]
+    for text, conf, top, bottom in words:
+        center = (top + bottom) / 2.0
+        for index, (span_top, span_bottom) in enumerate(spans):
+            if span_top - TILE_GAP / 2.0 <= center < span_bottom + TILE_GAP / 2.0:
+                grouped[index].append((text, conf))
+                break
+
+    results = []
+    for tile_words in grouped:
+        if not tile_words:
+            results.append(('', 0.0))
+            continue
+        text = ' '.join(word for word, _ in tile_words)
+        confidence = sum(conf for _, conf in tile_words) / len(tile_words)
+        results.append((text, confidence))
+    return results
+
+
+class TesseractEngine:
+    """One warm TessBaseAPI handle, initialised once with the plate settings"""
+
+    def __init__(self, lib, psm, whitelist, lang='eng', oem=OEM_DEFAULT):
+        self.lib = lib
+        self.handle = lib.TessBaseAPICreate()
+        datapath = os.getenv('TESSDATA_PREFIX')
+        if lib.TessBaseAPIInit2(self.handle,
+                                datapath.encode() if datapath else None,
+                                lang.encode(), oem) != 0:
+            lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+            raise RuntimeError("Could not initialise Tesseract (is tessdata installed?)")
+        self.psm = psm
+        lib.TessBaseAPISetPageSegMode(self.handle, psm)
+        if whitelist:
+            lib.TessBaseAPISetVariable(self.handle, b'tessedit_char_whitelist', whitelist.encode())
+
+    def read(self, image):
+        """OCR a grayscale or BGR uint8 numpy image straight from its buffer"""
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        # Tesseract reads the pixels in place; ``image`` stays referenced until OCR is done
+        self.lib.TessBaseAPISetImage(self.handle, image.ctypes.data, width, height,
+                                     bytes_per_pixel, image.strides[0])
+        self.lib.TessBaseAPISetSourceResolution(self.handle, 70)
+        text_ptr = self.lib.TessBaseAPIGetUTF8Text(self.handle)
+        try:
+            text = ctypes.string_at(text_ptr).decode('utf-8', errors='ignore') if text_ptr else ''
+        finally:
+            if text_ptr:
+                self.lib.TessDeleteText(text_ptr)
+        confidence = self.lib.TessBaseAPIMeanTextConf(self.handle)
+        self.lib.TessBaseAPIClear(self.handle)
+        return text, float(confidence)
+
+    def read_words(self, image, psm):
+        """OCR an image with a temporary page mode -> [(text, conf, top, bottom), ...]"""
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        self.lib.TessBaseAPISetPageSegMode(self.handle, psm)
+        self.lib.TessBaseAPISetImage(self.handle, image.ctypes.data, width, height,
+                                     1, image.strides[0])
+        self.lib.TessBaseAPISetSourceResolution(self.handle, 70)
+        words = []
+        try:
+            if self.lib.TessBaseAPIRecognize(self.handle, None) != 0:
+                return words
+            iterator = self.lib.TessBaseAPIGetIterator(self.handle)
+            if not iterator:
+                return words
+            try:
+                page_iterator = self.lib.TessResultIteratorGetPageIterator(iterator)
+                left, top, right, bottom = (ctypes.c_int() for _ in range(4))
+                while True:
+                    text_ptr = self.lib.TessResultIteratorGetUTF8Text(iterator, RIL_WORD)
+                    if text_ptr:
+                        text = ctypes.string_at(text_ptr).decode('utf-8', errors='ignore')
+                        self.lib.TessDeleteText(text_ptr)
+                        self.lib.TessPageIteratorBoundingBox(
+                            page_iterator, RIL_WORD, ctypes.byref(left), ctypes.byref(top),
+                            ctypes.byref(right), ctypes.byref(bottom))
+                        conf = self.lib.TessResultIteratorConfidence(iterator, RIL_WORD)
+                        if text.strip():
+                            words.append((text.strip(), float(conf), top.value, bottom.value))
+                    if not self.lib.TessResultIteratorNext(iterator, RIL_WORD):
+                        break
+            finally:
+                self.lib.TessResultIteratorDelete(iterator)
+        finally:
+            self.lib.TessBaseAPIClear(self.handle)
+            self.lib.TessBaseAPISetPageSegMode(self.handle, self.psm)
+        return words
+
+    def close(self):
+        if self.handle:
+            self.lib.TessBaseAPIEnd(self.handle)
+            self.lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+
+    def __del__(self):
+        self.close()
+
+
+class CapiBackend:
+    """In-process OCR through libtesseract's C API.
+
+    TessBaseAPI is not thread-safe, so each worker thread gets its own warm
+    engine the first time it reads a crop.
+    """
+
+    name = 'capi'
+
+    def __init__(self, lib, psm=PSM_SINGLE_WORD, whitelist=None):
+        self.lib = lib
+        self.psm = psm
+        self.whitelist = whitelist
+        self._local = threading.local()
+
+    def _engine(self):
+        engine = getattr(self._local, 'engine', None)
+        if engine is None:
+            engine = TesseractEngine(self.lib, self.psm, self.whitelist)
+            self._local.engine = engine
+        return engine
+
+    def read(self, image):
+        """Return (text, mean confidence 0-100) for a single image"""
+        return self._engine().read(image)
+
+    def read_batch(self, images):
+        """OCR many crops in one recognition pass -> [(text, conf), ...]"""
+        if len(images) == 1:
+            return [self.read(images[0])]
+        mosaic, spans = build_mosaic(images)
+        words = self._engine().read_words(mosaic, PSM_SINGLE_BLOCK)
+        return group_words_by_tile(words, spans)
+
+
+class PytesseractBackend:
+    """Fallback that shells out to the tesseract binary for every image"""
+
+    name = 'pytesseract'
+
+    def __init__(self, psm=PSM_SINGLE_WORD, whitelist=None):
+        self.config = self._config(psm, whitelist)
+        self.batch_config = self._config(PSM_SINGLE_BLOCK, whitelist)
+
+    @staticmethod
+    def _config(psm, whitelist):
+        config = f'--psm {psm} --oem {OEM_DEFAULT}'
+        if whitelist:
+            config += f' -c tessedit_char_whitelist={whitelist}'
+        return config
+
+    def _words(self, image, config):
+        data = pytesseract.image_to_data(image, config=config,
+                                         output_type=pytesseract.Output.DICT)
+        words = []
+        for text, conf, top, height in zip(data['text'], data['conf'], data['top'], data['height']):
+            if text.strip():
+                words.append((text.strip(), float(conf), top, top + height))
+        return words
+
+    def read(self, image):
+        """Return (text, mean confidence 0-100) for a single image"""
+        words = self._words(image, self.config)
+        if not words:
+            return '', 0.0
+        text = ' '.join(word[0] for word in words)
+        return text, sum(word[1] for word in words) / len(words)
+
+    def read_batch(self, images):
+        """OCR many crops with one tesseract process -> [(text, conf), ...]"""
+        if len(images) == 1:
+            return [self.read(images[0])]
+        mosaic, spans = build_mosaic(images)
+        return group_words_by_tile(self._words(mosaic, self.batch_config), spans)
+
+
+def create_backend(psm=PSM_SINGLE_WORD, whitelist=None, prefer=None):
+    """Pick the fastest OCR backend available on this machine.
+
+    ``prefer`` (or the OCR_BACKEND env var) can force 'capi' or 'pytesseract'.
+    """
+    prefer = prefer or os.getenv('OCR_BACKEND', 'capi')
+    if prefer == 'capi':
+        lib = _load_libtesseract()
+        if lib is not None:
+            backend = CapiBackend(lib, psm, whitelist)
+            try:
+                backend._engine()
+                return backend
+            except RuntimeError as e:
+                print(f"[OCR] {e}; falling back to pytesseract")
+        else:
+            print("[OCR] libtesseract not found; falling back to pytesseract")
+    return PytesseractBackend(psm, whitelist)
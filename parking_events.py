@@ -0,0 +1,101 @@
+import json
+import select
+import time
+
+import psycopg2
+
+# Session writes in database.py publish a JSON event here when they commit
+EVENT_CHANNEL = 'parking_events'
+
+class ParkingEventListener:
+    """LISTENs for parking events on a dedicated connection and passes each to ``handler``.
+
+    NOTIFY is only delivered to a session that stays connected, so this keeps
+    its own connection outside the pool and reconnects with backoff. Events
+    sent while disconnected are lost; ``on_connect`` runs after every
+    (re)connect so the caller can resynchronise.
+
+    With ``leader_lock_id`` set, every listener competes for that session
+    advisory lock and ``is_leader`` tells which one holds it, so several
+    dashboard processes can elect a single one to do per-event work. The lock
+    is released when the holder's connection drops and another takes over
+    within ``poll_seconds``.
+    """
+
+    def __init__(self, conn_params, handler, on_connect=None, channel=EVENT_CHANNEL,
+                 poll_seconds=5.0, sleep=time.sleep, leader_lock_id=None):
+        self.conn_params = conn_params
+        self.handler = handler
+        self.on_connect = on_connect
+        self.channel = channel
+        self.poll_seconds = poll_seconds
+        self.sleep = sleep
+        self.leader_lock_id = leader_lock_id
+        self.is_leader = leader_lock_id is None
+        self.running = True
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.conn_params)
+        conn.set_session(autocommit=True)
+        conn.cursor().execute(f'LISTEN {self.channel}')
+        print(f"[EVENTS] Listening on {self.channel}")
+        return conn
+
+    def _try_lead(self, conn):
+        if self.is_leader:
+            return
+        cursor = conn.cursor()
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', (self.leader_lock_id,))
+        if cursor.fetchone()[0]:
+            self.is_leader = True
+            print("[EVENTS] This process now relays events to browsers")
+
+    def _dispatch(self, conn):
+        conn.poll()
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            try:
+                event = json.loads(notify.payload)
+            except ValueError:
+                print(f"[EVENTS] Ignoring malformed payload: {notify.payload!r}")
+                continue
+            try:
+                self.handler(event)
+            except Exception as e:
+                print(f"[EVENTS] Handler failed for {event.get('type')}: {e}")
+
+    def run(self):
+        backoff = 1
+        while self.running:
+            try:
+                conn = self._connect()
+            except psycopg2.OperationalError as e:
+                print(f"[EVENTS] Connect failed, retrying in {backoff}s: {e}")
+                self.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            backoff = 1
+            try:
+                self._try_lead(conn)
+                next_lead = time.monotonic() + self.poll_seconds
+                if self.on_connect:
+                    self.on_connect()
+                while self.running:
+                    # Wakes as soon as a notification arrives
+                    readable, _, _ = select.select([conn], [], [], self.poll_seconds)
+                    if readable:
+                        self._dispatch(conn)
+                    # On a schedule, not only when idle: steady NOTIFY traffic
+                    # must not keep a dead leader's lock from being taken over
+                    if time.monotonic() >= next_lead:
+                        self._try_lead(conn)
+                        next_lead = time.monotonic() + self.poll_seconds
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                print(f"[EVENTS] Listener connection lost: {e}")
+            finally:
+                if self.leader_lock_id is not None:
+                    self.is_leader = False  # the lock went with the session
+                conn.close()
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,205 @@
+import os
+import sys
+import time
+from datetime import date, datetime
+
+# vehicles is range-partitioned by entry_time, one partition per month
+# (vehicles_y2025m06, ...), plus vehicles_default as a safety net so an
+# insert never fails when maintenance is late. Closed, paid sessions older
+# than ARCHIVE_AFTER_MONTHS move to vehicles_archive, which can live on a
+# cheaper tablespace (ARCHIVE_TABLESPACE).
+#
+# Partition creation and archiving are a scheduled job, not part of gate
+# startup (gates never run DDL). Run it daily from cron / Task Scheduler:
+#   python partitions.py --archive
+# or keep it running as a service:
+#   python partitions.py --archive --every 24
+# Runs are serialized by an advisory lock; a run that finds another in
+# progress skips. Gate processes only warn when upcoming partitions are
+# missing (check_partitions).
+PARTITIONS_AHEAD = int(os.getenv('PARTITIONS_AHEAD', '3'))
+ARCHIVE_AFTER_MONTHS = int(os.getenv('ARCHIVE_AFTER_MONTHS', '3'))
+ARCHIVE_TABLESPACE = os.getenv('ARCHIVE_TABLESPACE')
+
+# Arbitrary advisory lock key shared by every partition maintenance run
+MAINTENANCE_LOCK_ID = 72_450_003
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"vehicles_y{month.year}m{month.month:02d}"
+
+
+def existing_partitions(cursor):
+    """Names of the monthly partitions currently attached to vehicles"""
+    cursor.execute('''
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = 'vehicles' AND child.relname <> 'vehicles_default'
+    ''')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_month_partition(cursor, month):
+    """Create and attach one monthly partition.
+
+    Rows that already landed in vehicles_default for that month are moved
+    into the new table before it is attached.
+    """
+    name = partition_name(month)
+    start, end = month, add_months(month, 1)
+    cursor.execute(f'CREATE TABLE {name} (LIKE vehicles INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute('SELECT to_regclass(%s)', ('vehicles_default',))
+    if cursor.fetchone()[0] is not None:
+        cursor.execute(f'''
+        WITH moved AS (
+            DELETE FROM vehicles_default
+            WHERE entry_time >= %s AND entry_time < %s
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        ''', (start, end))
+    cursor.execute(f'''
+    ALTER TABLE vehicles ATTACH PARTITION {name}
+    FOR VALUES FROM (%s) TO (%s)
+    ''', (start, end))
+    print(f"[PARTITION] Created {name}")
+
+
+def ensure_partitions(cursor, first_month, last_month):
+    """Make sure every month from first_month to last_month has a partition"""
+    existing = existing_partitions(cursor)
+    month = month_start(first_month)
+    while month <= last_month:
+        if partition_name(month) not in existing:
+            create_month_partition(cursor, month)
+        month = add_months(month, 1)
+
+
+def check_partitions(db, months_ahead=1):
+    """Names of missing partitions for this month and the next ``months_ahead`` (read-only)"""
+    this_month = month_start(datetime.now())
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        existing = existing_partitions(cursor)
+        conn.rollback()
+    wanted = [partition_name(add_months(this_month, ahead)) for ahead in range(months_ahead + 1)]
+    missing = [name for name in wanted if name not in existing]
+    if missing:
+        print(f"[PARTITION] Missing {', '.join(missing)}; new rows go to vehicles_default "
+              f"until `python partitions.py` runs")
+    return missing
+
+
+def _try_lock(conn):
+    cursor = conn.cursor()
+    cursor.execute('SELECT pg_try_advisory_lock(%s)', (MAINTENANCE_LOCK_ID,))
+    locked = cursor.fetchone()[0]
+    conn.commit()
+    if not locked:
+        print("[PARTITION] Another maintenance run is in progress; skipping")
+    return locked
+
+
+def _unlock(conn):
+    conn.rollback()
+    cursor = conn.cursor()
+    cursor.execute('SELECT pg_advisory_unlock(%s)', (MAINTENANCE_LOCK_ID,))
+    conn.commit()
+
+
+def maintain_partitions(db, months_ahead=PARTITIONS_AHEAD):
+    """Create partitions for the current month and the next ``months_ahead``.
+
+    Returns False (and does nothing) if another run holds the maintenance lock.
+    """
+    this_month = month_start(datetime.now())
+    with db.get_connection() as conn:
+        if not _try_lock(conn):
+            return False
+        try:
+            cursor = conn.cursor()
+            ensure_partitions(cursor, this_month, add_months(this_month, months_ahead))
+            conn.commit()
+        finally:
+            _unlock(conn)
+    return True
+
+
+def archive_closed_sessions(db, older_than_months=ARCHIVE_AFTER_MONTHS):
+    """Move closed, paid sessions out of old partitions into vehicles_archive.
+
+    Open or unpaid sessions stay in the hot table. Partitions left empty are
+    dropped, so gate lookups and dashboard scans only touch recent months.
+    Returns the number of sessions archived, or None if another run holds
+    the maintenance lock.
+    """
+    cutoff = add_months(month_start(datetime.now()), -older_than_months)
+    archived = 0
+    with db.get_connection() as conn:
+        if not _try_lock(conn):
+            return None
+        try:
+            cursor = conn.cursor()
+            for name in sorted(existing_partitions(cursor)):
+                year, month = int(name[10:14]), int(name[15:17])
+                if date(year, month, 1) >= cutoff:
+                    continue
+                cursor.execute(f'''
+                WITH moved AS (
+                    DELETE FROM {name}
+                    WHERE exit_time IS NOT NULL AND payment_status = 1
+                    RETURNING *
+                )
+                INSERT INTO vehicles_archive SELECT * FROM moved
+                ''')
+                archived += cursor.rowcount
+                cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {name})')
+                if not cursor.fetchone()[0]:
+                    cursor.execute(f'DROP TABLE {name}')
+                    print(f"[ARCHIVE] Dropped empty partition {name}")
+                conn.commit()
+        finally:
+            _unlock(conn)
+    print(f"[ARCHIVE] Moved {archived} closed session(s) to vehicles_archive")
+    return archived
+
+
+def run_maintenance(db, archive=False):
+    """One scheduled run: create upcoming partitions, then optionally archive"""
+    maintain_partitions(db)
+    if archive:
+        archive_closed_sessions(db)
+
+
+if __name__ == '__main__':
+    # python partitions.py                       -> create upcoming partitions
+    # python partitions.py --archive             -> also archive old closed sessions
+    # python partitions.py [--archive] --every H -> repeat every H hours
+    import psycopg2
+
+    from database import ParkingDatabase
+
+    db = ParkingDatabase()
+    archive = '--archive' in sys.argv
+    if '--every' not in sys.argv:
+        run_maintenance(db, archive)
+        sys.exit(0)
+    interval = float(sys.argv[sys.argv.index('--every') + 1]) * 3600
+    while True:
+        try:
+            run_maintenance(db, archive)
+        except psycopg2.Error as e:
+            # Try again next round; vehicles_default holds new rows meanwhile
+            print(f"[PARTITION] Maintenance failed: {e}")
+        time.sleep(interval)
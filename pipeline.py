@@ -0,0 +1,180 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from motion_gate import MotionGate
+from plate_tracker import PlateTracker
+
+
+class FrameGrabber(threading.Thread):
+    """Capture thread that keeps only the newest frames (drop-oldest ring buffer).
+
+    Readers always get the most recent frame, so slow consumers never make the
+    camera buffer go stale.
+    """
+
+    def __init__(self, source=0, buffer_size=2, name=None):
+        super().__init__(daemon=True, name=name)
+        self.cap = cv2.VideoCapture(source)
+        self.buffer = deque(maxlen=buffer_size)
+        self.cond = threading.Condition()
+        self.seq = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                print(f"[CAMERA] {self.name}: frame grab failed, stopping capture")
+                break
+            with self.cond:
+                self.seq += 1
+                self.buffer.append((self.seq, frame))
+                self.cond.notify_all()
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.cap.release()
+
+    def read(self, after_seq=0, timeout=1.0):
+        """Return (seq, frame) for the newest frame newer than ``after_seq``"""
+        with self.cond:
+            self.cond.wait_for(
+                lambda: not self.running or (self.buffer and self.buffer[-1][0] > after_seq),
+                timeout,
+            )
+            if self.buffer and self.buffer[-1][0] > after_seq:
+                return self.buffer[-1]
+            return None, None
+
+    def stop(self):
+        self.running = False
+
+
+class DetectionPipeline:
+    """Capture -> detection -> OCR worker pool, each stage on its own thread(s).
+
+    ``recognizer`` is a ``plate_recognition.PlateRecognizer``. Boxes are
+    followed across frames by a ``PlateTracker``; valid reads vote on their
+    track and each vehicle's committed plate is delivered once as a
+    ``PlateDecision`` on ``self.events``. Tracks that are already decided are
+    not OCR'd again, and a ``MotionGate`` skips detection on static frames.
+
+    All crops of a frame are OCR'd in one batched call. With
+    ``batch_window`` > 0, crops from consecutive frames are held for up to
+    that many seconds (or ``max_batch`` crops) and OCR'd together.
+
+    Several pipelines can share one recognizer and one ``ocr_pool``
+    (a ThreadPoolExecutor, left running by ``stop()``).
+    """
+
+    def __init__(self, grabber, recognizer, ocr_workers=2, should_detect=None,
+                 batch_window=0.0, max_batch=8, tracker=None, motion_gate=None,
+                 ocr_pool=None):
+        self.grabber = grabber
+        self.recognizer = recognizer
+        self.tracker = tracker or PlateTracker()
+        self.motion_gate = motion_gate or MotionGate()
+        self.should_detect = should_detect or (lambda: True)
+        self.events = queue.Queue()
+        self.owns_ocr_pool = ocr_pool is None
+        self.ocr_pool = ocr_pool or ThreadPoolExecutor(max_workers=ocr_workers)
+        self.max_pending_ocr = ocr_workers * 2
+        self.pending_ocr = 0
+        self.pending_lock = threading.Lock()
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.batch_crops = []
+        self.batch_boxes = []
+        self.batch_track_ids = []
+        self.batch_started = 0.0
+        self.latest = (None, [])  # (frame, boxes) from the last detection pass
+        self.running = True
+        self.worker = threading.Thread(target=self._inference_loop, daemon=True,
+                                       name=f"{grabber.name}-detect")
+
+    def start(self):
+        self.grabber.start()
+        self.worker.start()
+
+    def _inference_loop(self):
+        last_seq = 0
+        backoff = 0.0
+        while self.running and self.grabber.running:
+            seq, frame = self.grabber.read(after_seq=last_seq)
+            if frame is None:
+                continue
+            last_seq = seq
+
+            if not self.should_detect() or not self.motion_gate.should_run(
+                    frame, busy=self.tracker.busy):
+                self.latest = (frame, [])
+                continue
+
+            try:
+                boxes = self.recognizer.detect(frame)
+            except Exception as e:
+                # A failed forward pass must not leave the lane blind for good
+                backoff = min(max(backoff * 2, 0.5), 10.0)
+                print(f"[DETECT] {self.grabber.name}: detection failed, retrying in {backoff:.1f}s: {e}")
+                self.latest = (frame, [])
+                time.sleep(backoff)
+                continue
+            backoff = 0.0
+            self.latest = (frame, boxes)
+            crops, boxes = self.recognizer.crops_for(frame, boxes)
+            tracks = self.tracker.update_boxes(boxes)
+            pending = [(crop, track) for crop, track in zip(crops, tracks) if not track.resolved]
+            if pending and not self.batch_crops:
+                self.batch_started = time.monotonic()
+            for crop, track in pending:
+                self.batch_crops.append(crop)
+                self.batch_boxes.append(track.box)
+                self.batch_track_ids.append(track.id)
+
+            if self.batch_crops and (
+                    len(self.batch_crops) >= self.max_batch or
+                    time.monotonic() - self.batch_started >= self.batch_window):
+                self._submit_batch()
+
+    def _submit_batch(self):
+        crops, boxes, track_ids = self.batch_crops, self.batch_boxes, self.batch_track_ids
+        self.batch_crops, self.batch_boxes, self.batch_track_ids = [], [], []
+        with self.pending_lock:
+            # OCR is falling behind; newer frames will carry the same plates
+            if self.pending_ocr >= self.max_pending_ocr:
+                return
+            self.pending_ocr += 1
+        self.ocr_pool.submit(self._ocr, crops, boxes, track_ids)
+
+    def _ocr(self, crops, boxes, track_ids):
+        try:
+            reads = self.recognizer.read_crops(crops, boxes)
+            for track_id, read in zip(track_ids, reads):
+                decision = self.tracker.add_read(track_id, read)
+                if decision:
+                    self.events.put(decision)
+        except Exception as e:
+            print(f"[OCR] Error: {e}")
+        finally:
+            with self.pending_lock:
+                self.pending_ocr -= 1
+
+    def stop(self):
+        self.running = False
+        self.grabber.stop()
+        if self.owns_ocr_pool:
+            self.ocr_pool.shutdown(wait=False)
+
+
+def draw_boxes(frame, boxes):
+    """Draw detection boxes on a copy of the frame for display"""
+    annotated = frame.copy()
+    for x1, y1, x2, y2 in boxes:
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    return annotated
+
@@ -0,0 +1,213 @@
+import os
+import threading
+
+import cv2
+import pytesseract
+from dotenv import load_dotenv
+
+from ocr_backend import PSM_SINGLE_WORD, create_backend
+
+load_dotenv()
+
+# Default locations can be overridden from .env
+MODEL_PATH = os.getenv('YOLO_MODEL_PATH', r'D:\PRACTICE\parking-management-system\best.pt')
+TESSERACT_CMD = os.getenv(
+    'TESSERACT_CMD',
+    r'C:\Program Files\Tesseract-OCR\tesseract.exe' if os.name == 'nt' else ''
+)
+if TESSERACT_CMD:
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+PLATE_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(model_path=None):
+    """Load the YOLO plate detector once per process and share it"""
+    model_path = model_path or MODEL_PATH
+    with _models_lock:
+        model = _models.get(model_path)
+        if model is None:
+            # Imported lazily: pulling in torch is the slowest part of startup
+            from ultralytics import YOLO
+            model = YOLO(model_path)
+            _models[model_path] = model
+        return model
+
+
+def result_boxes(result):
+    """Boxes of one ultralytics result as (x1, y1, x2, y2) integer tuples"""
+    return [tuple(map(int, box.xyxy[0])) for box in result.boxes]
+
+
+def validate_plate(text):
+    """Return the 7-char Rwandan plate (RA + letter, 3 digits, letter) found in OCR text"""
+    text = text.strip().replace(" ", "").upper()
+    start = text.find("RA")
+    if start == -1:
+        return None
+    candidate = text[start:start + 7]
+    if len(candidate) != 7:
+        return None
+    prefix, digits, suffix = candidate[:3], candidate[3:6], candidate[6]
+    if prefix.isalpha() and digits.isdigit() and suffix.isalpha():
+        return candidate
+    return None
+
+
+class PlateRead:
+    """One detected plate box and what OCR made of it"""
+
+    def __init__(self, box, raw_text, plate, crop, processed, confidence=0.0):
+        self.box = box              # (x1, y1, x2, y2) in frame coordinates
+        self.raw_text = raw_text    # OCR output before validation
+        self.plate = plate          # validated plate number, or None
+        self.confidence = confidence  # OCR mean confidence, 0-100
+        self.crop = crop            # BGR crop from the frame
+        self.processed = processed  # binarized image fed to OCR
+
+    def __repr__(self):
+        return f"PlateRead(box={self.box}, plate={self.plate!r}, raw_text={self.raw_text!r})"
+
+
+class PlateRecognizer:
+    """YOLO detection + preprocessing + Tesseract OCR + plate validation.
+
+    Preprocessing is configurable so it can be tuned in one place:
+    ``blur_kernel`` (None disables blurring), ``threshold`` ('otsu',
+    'adaptive' or None) and ``scale`` (upscale factor for small crops).
+    OCR goes through a warm in-process Tesseract engine when libtesseract is
+    available (see ``ocr_backend``). ``detect`` is serialized, so one
+    recognizer (and one model in memory) can serve several camera lanes;
+    with a ``detector`` (an ``inference_service.InferenceService``) their
+    frames are batched into shared forward passes instead. ``backend``
+    ('torch', 'onnx' or 'openvino', default DETECTOR_BACKEND) picks the
+    model runtime (see ``detector_backends``); ``model_path`` is then the
+    model file for that backend.
+    """
+
+    def __init__(self, model_path=None, conf=0.25, blur_kernel=(5, 5),
+                 threshold='otsu', scale=1.0, ocr_backend=None, detector=None,
+                 backend=None):
+        self.model_path = model_path
+        self.detector = detector
+        self.backend = backend
+        self.conf = conf
+        self.blur_kernel = blur_kernel
+        self.threshold = threshold
+        self.scale = scale
+        self._ocr_backend = ocr_backend
+        self._ocr_lock = threading.Lock()
+        self._detect_lock = threading.Lock()
+
+    @property
+    def model(self):
+        from detector_backends import get_detector
+        return get_detector(self.backend, self.model_path)
+
+    @property
+    def ocr_backend(self):
+        if self._ocr_backend is None:
+            with self._ocr_lock:
+                if self._ocr_backend is None:
+                    self._ocr_backend = create_backend(PSM_SINGLE_WORD, PLATE_CHARS)
+                    print(f"[OCR] Using {self._ocr_backend.name} backend")
+        return self._ocr_backend
+
+    def detect(self, frame):
+        """Return plate boxes as (x1, y1, x2, y2) integer tuples"""
+        if self.detector is not None:
+            return self.detector.detect(frame)
+        with self._detect_lock:
+            return self.model.detect(frame, self.conf)
+
+    def preprocess(self, crop):
+        """Turn a BGR plate crop into the binary image OCR reads best"""
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        if self.scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale,
+                              interpolation=cv2.INTER_CUBIC)
+        if self.blur_kernel:
+            gray = cv2.GaussianBlur(gray, self.blur_kernel, 0)
+        if self.threshold == 'otsu':
+            return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+        if self.threshold == 'adaptive':
+            return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                         cv2.THRESH_BINARY, 31, 10)
+        return gray
+
+    def read_text(self, processed):
+        """Run OCR on a preprocessed crop -> (text, confidence)"""
+        return self.ocr_backend.read(processed)
+
+    def read_crop(self, crop, box=None):
+        """OCR a single plate crop"""
+        processed = self.preprocess(crop)
+        raw_text, confidence = self.read_text(processed)
+        raw_text = raw_text.strip()
+        return PlateRead(box, raw_text, validate_plate(raw_text), crop, processed, confidence)
+
+    def read_crops(self, crops, boxes=None):
+        """OCR several plate crops in one batched OCR call"""
+        if not crops:
+            return []
+        boxes = boxes or [None] * len(crops)
+        processed = [self.preprocess(crop) for crop in crops]
+        results = self.ocr_backend.read_batch(processed)
+        reads = []
+        for crop, box, image, (raw_text, confidence) in zip(crops, boxes, processed, results):
+            raw_text = raw_text.strip()
+            reads.append(PlateRead(box, raw_text, validate_plate(raw_text), crop, image, confidence))
+        return reads
+
+    def crops_for(self, frame, boxes):
+        """Cut the boxes out of a frame, dropping empty ones"""
+        crops, kept = [], []
+        for box in boxes:
+            x1, y1, x2, y2 = box
+            crop = frame[y1:y2, x1:x2]
+            if crop.size == 0:
+                continue
+            crops.append(crop)
+            kept.append(box)
+        return crops, kept
+
+    def recognize(self, frame):
+        """Detect every plate in the frame and OCR them all in one batch"""
+        crops, boxes = self.crops_for(frame, self.detect(frame))
+        return self.read_crops(crops, boxes)
+
+    def recognize_frames(self, frames):
+        """Detect plates in a window of frames and OCR every crop in one batch.
+
+        Returns one list of PlateRead per input frame.
+        """
+        crops, boxes, owners = [], [], []
+        for index, frame in enumerate(frames):
+            frame_crops, frame_boxes = self.crops_for(frame, self.detect(frame))
+            crops += frame_crops
+            boxes += frame_boxes
+            owners += [index] * len(frame_crops)
+
+        reads_per_frame = [[] for _ in frames]
+        for owner, read in zip(owners, self.read_crops(crops, boxes)):
+            reads_per_frame[owner].append(read)
+        return reads_per_frame
+
+
+_default_recognizer = None
+
+
+def get_recognizer():
+    """Process-wide recognizer with the default configuration"""
+    global _default_recognizer
+    if _default_recognizer is None:
+        _default_recognizer = PlateRecognizer()
+    return _default_recognizer
+
+
+def recognize(frame):
+    """Detect and read all plates in a frame -> list[PlateRead]"""
+    return get_recognizer().recognize(frame)
@@ -0,0 +1,226 @@
+import itertools
+import threading
+import time
+from collections import defaultdict
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x1, y1, x2, y2) boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+def centroid_distance(a, b):
+    """Distance between box centres, relative to the diagonal of ``a``"""
+    ax, ay = (a[0] + a[2]) / 2.0, (a[1] + a[3]) / 2.0
+    bx, by = (b[0] + b[2]) / 2.0, (b[1] + b[3]) / 2.0
+    diagonal = max(1.0, ((a[2] - a[0]) ** 2 + (a[3] - a[1]) ** 2) ** 0.5)
+    return ((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5 / diagonal
+
+
+class Track:
+    """One plate followed across frames, with its accumulated OCR votes"""
+
+    def __init__(self, track_id, box, now):
+        self.id = track_id
+        self.box = box
+        self.first_seen = now
+        self.last_seen = now
+        self.reads = 0
+        # position -> character -> summed confidence weight
+        self.votes = defaultdict(lambda: defaultdict(float))
+        self.best_read = None
+        self.plate = None  # set once the vote is decided
+        self.hint = None   # plate last seen at this spot, confirmed by the next read
+        self.from_cache = False
+        self.recheck_at = None  # when a refused decision is voted on again
+
+    @property
+    def resolved(self):
+        return self.plate is not None
+
+    def reset(self):
+        """Forget the decision and votes so the plate is read and decided again"""
+        self.votes = defaultdict(lambda: defaultdict(float))
+        self.reads = 0
+        self.best_read = None
+        self.plate = None
+        self.hint = None
+        self.from_cache = False
+        self.recheck_at = None
+
+    def add_vote(self, plate, weight):
+        for position, char in enumerate(plate):
+            self.votes[position][char] += weight
+        self.reads += 1
+
+    def leader(self):
+        """Current best plate, its weakest per-character support and agreement"""
+        chars, support, agreement = [], float('inf'), 1.0
+        for position in sorted(self.votes):
+            scores = self.votes[position]
+            char, score = max(scores.items(), key=lambda item: item[1])
+            chars.append(char)
+            support = min(support, score)
+            agreement = min(agreement, score / sum(scores.values()))
+        return ''.join(chars), support, agreement
+
+
+class PlateDecision:
+    """A plate committed by the tracker for one vehicle"""
+
+    def __init__(self, track, plate, support, agreement):
+        self.track_id = track.id
+        self.plate = plate
+        self.support = support        # summed confidence behind the weakest character
+        self.agreement = agreement    # share of votes the weakest character won
+        self.reads = track.reads
+        self.best_read = track.best_read
+
+
+class PlateTracker:
+    """Associates plate boxes across frames and votes on their OCR reads.
+
+    Each valid read adds its OCR confidence (0-1) to every character
+    position of its track. A track is decided as soon as every position has
+    at least ``decide_support`` weight with ``min_agreement`` of the votes, or
+    after ``max_reads`` reads by plain majority. Tracks unseen for
+    ``max_age`` seconds expire, and resolved tracks need no more OCR.
+
+    Plates of expired resolved tracks are remembered by box position for
+    up to ``memory_ttl`` seconds, but only while the car stays put: an entry
+    is dropped by the first detection pass that finds its spot empty. A
+    new track in the same spot starts with that
+    plate as a hint: one matching read resolves it without a second
+    decision (the parked car seen again), any other read is voted on as
+    usual, so the next car at the gate is never taken for the previous one.
+
+    ``recheck(track_id, after)`` re-opens a decided track ``after`` seconds
+    later, for a lane that refused the car (an unpaid exit) and has to
+    check it again while it waits. Such tracks are not remembered.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_centroid_shift=0.5, max_age=2.0,
+                 decide_support=1.5, min_agreement=0.6, max_reads=5, min_weight=0.1,
+                 memory_ttl=600.0, memory_iou=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_centroid_shift = max_centroid_shift
+        self.max_age = max_age
+        self.decide_support = decide_support
+        self.min_agreement = min_agreement
+        self.max_reads = max_reads
+        self.min_weight = min_weight
+        self.memory_ttl = memory_ttl
+        self.memory_iou = memory_iou
+        self.memory = []  # (box, plate, expires_at) of expired resolved tracks
+        self.cache_hits = 0
+        self.tracks = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _expire(self, now):
+        for track_id in [t.id for t in self.tracks.values() if now - t.last_seen > self.max_age]:
+            track = self.tracks.pop(track_id)
+            if track.resolved and track.recheck_at is None:
+                self.memory.append((track.box, track.plate, now + self.memory_ttl))
+        self.memory = [entry for entry in self.memory if entry[2] > now]
+
+    def _recall(self, box):
+        """Plate last resolved at (roughly) this box position, if still cached"""
+        best, best_iou = None, self.memory_iou
+        for index, (cached_box, _, _) in enumerate(self.memory):
+            iou = box_iou(cached_box, box)
+            if iou >= best_iou:
+                best, best_iou = index, iou
+        if best is None:
+            return None
+        return self.memory.pop(best)[1]
+
+    @property
+    def busy(self):
+        """True while some visible plate is still being voted on or due a recheck"""
+        now = time.monotonic()
+        with self.lock:
+            return any(not track.resolved or
+                       (track.recheck_at is not None and track.recheck_at <= now)
+                       for track in self.tracks.values())
+
+    def recheck(self, track_id, after, now=None):
+        """Vote on a decided track again ``after`` seconds from now, if it is still in view"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            track = self.tracks.get(track_id)
+            if track is not None:
+                track.recheck_at = now + after
+
+    def update_boxes(self, boxes, now=None):
+        """Match this frame's boxes to tracks (creating new ones) -> list of Track"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self._expire(now)
+            # Keep only plates whose spot is still occupied in this frame
+            self.memory = [entry for entry in self.memory
+                           if any(box_iou(entry[0], box) >= self.memory_iou for box in boxes)]
+            unmatched = set(self.tracks)
+            matched = []
+            for box in boxes:
+                best, best_score = None, 0.0
+                for track_id in unmatched:
+                    track = self.tracks[track_id]
+                    iou = box_iou(track.box, box)
+                    if iou >= self.iou_threshold:
+                        score = 1.0 + iou
+                    elif centroid_distance(track.box, box) <= self.max_centroid_shift:
+                        score = 1.0 - centroid_distance(track.box, box)
+                    else:
+                        continue
+                    if score > best_score:
+                        best, best_score = track, score
+                if best is None:
+                    best = Track(next(self._ids), box, now)
+                    best.hint = self._recall(box)
+                    self.tracks[best.id] = best
+                else:
+                    unmatched.discard(best.id)
+                    best.box = box
+                    best.last_seen = now
+                    if best.recheck_at is not None and best.recheck_at <= now:
+                        best.reset()
+                matched.append(best)
+            return matched
+
+    def add_read(self, track_id, read, now=None):
+        """Vote with a validated PlateRead; returns a PlateDecision the first time a track resolves"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            track = self.tracks.get(track_id)
+            if track is None or track.resolved or not read.plate:
+                return None
+            if track.hint is not None:
+                hint, track.hint = track.hint, None
+                if read.plate == hint:
+                    # The same parked car: already decided when it first arrived
+                    track.plate = hint
+                    track.best_read = read
+                    track.last_seen = now
+                    track.from_cache = True
+                    self.cache_hits += 1
+                    return None
+            weight = max(self.min_weight, read.confidence / 100.0)
+            track.add_vote(read.plate, weight)
+            track.last_seen = now
+            if track.best_read is None or read.confidence > track.best_read.confidence:
+                track.best_read = read
+
+            plate, support, agreement = track.leader()
+            confident = support >= self.decide_support and agreement >= self.min_agreement
+            if confident or track.reads >= self.max_reads:
+                track.plate = plate
+                return PlateDecision(track, plate, support, agreement)
+            return None
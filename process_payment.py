@@ -1,8 +1,15 @@
 import serial
-import time
+import os
 import re
+import threading
 from datetime import datetime
 from database import ParkingDatabase
+from serial_protocol import SerialLineReader
+from session_store import SessionStore
+
+# Handshake timeouts (the Arduino itself gives up 10 s after sending READY)
+READY_TIMEOUT = 3
+DONE_TIMEOUT = 10
 
 def calculate_payment(entry_time, exit_time):
     duration = (exit_time - entry_time).total_seconds() / 60
@@ -18,77 +25,138 @@ def is_noise(line):
     line_lower = line.lower()
     return any(line_lower.startswith(prefix.lower()) for prefix in noise_prefixes)
 
-def main():
-    db = ParkingDatabase()
-    arduino_port = "COM13"
-    baud_rate = 9600
+def parse_card_line(line):
+    """Parse a 'PLATE,BALANCE' card scan line -> (plate, balance) or None"""
+    if ',' not in line:
+        return None
+    plate_raw, _, balance_raw = line.partition(',')
+    plate = plate_raw.strip().replace('\x00', '')
+    balance_cleaned = re.sub(r'[^\d]', '', balance_raw)
+    if not plate or not balance_cleaned.isdigit():
+        return None
+    return plate, int(balance_cleaned)
+
+class PaymentKiosk(threading.Thread):
+    """Runs the payment handshake for one RFID reader.
+
+    scan (PLATE,BALANCE) -> quote from ``db`` -> wait for READY -> send the
+    new balance (or 'I' to refuse) -> wait for DONE -> commit the payment.
+    ``db`` is a ParkingDatabase or a SessionStore.
+    Every wait has a timeout, so a lost line resets the kiosk instead of
+    hanging it. Each kiosk owns its own serial port and reader thread, so
+    several readers can run in one process.
+    """
+
+    def __init__(self, port, db, baud_rate=9600):
+        super().__init__(daemon=True, name=f"kiosk-{port}")
+        self.port = port
+        self.db = db
+        self.baud_rate = baud_rate
+        self.reader = None
+        self.running = True
+
+    def connect(self):
+        try:
+            link = serial.Serial(self.port, self.baud_rate, timeout=1)
+        except serial.SerialException as e:
+            print(f"[ERROR] Serial port error on {self.port}: {e}")
+            return False
+        self.reader = SerialLineReader(link, name=f"reader-{self.port}")
+        self.reader.start()
+        print(f"✅ Connected to {self.port}")
+        return True
+
+    def run(self):
+        print(f"📡 [{self.port}] Waiting for card scan...\n")
+        while self.running and self.reader.running:
+            line = self.reader.read_line(timeout=1)
+            if line is None or is_noise(line):
+                continue
+            card = parse_card_line(line)
+            if not card:
+                continue
+            try:
+                self.handle_card(*card)
+            except Exception as e:
+                print(f"[ERROR] [{self.port}] {e}")
+
+    def handle_card(self, plate, balance):
+        print(f"\n🚗 [{self.port}] Plate: {plate} | 💰 Balance: {balance} RWF")
+
+        # Quote
+        entry_time = self.db.get_unpaid_entry(plate)
+        if not entry_time:
+            print(f"⚠️ No unpaid entry found for {plate}")
+            self.reply("I")
+            return
+
+        exit_time = datetime.now()
+        duration, amount_due = calculate_payment(entry_time, exit_time)
+        print(f"⏱️ Duration: {int(duration)} mins | 🧾 Amount Due: {amount_due} RWF")
+
+        new_balance = balance - amount_due
+        if new_balance < 0:
+            print("❌ Insufficient balance.")
+            self.reply("I")
+            return
+
+        # Write the new balance once the reader is listening
+        if not self.reply(str(new_balance)):
+            return
+
+        # Commit only after the card has actually been written
+        done = self.reader.wait_for(lambda l: l.upper() == "DONE", DONE_TIMEOUT)
+        if done is None:
+            print(f"[TIMEOUT] [{self.port}] Card write not confirmed; payment not recorded")
+            return
+
+        self.db.update_payment(plate, amount_due, exit_time)
+        print(f"✅ Payment success | 🔄 New Balance: {new_balance} RWF")
+
+    def reply(self, message):
+        """Wait for the reader's READY, then send one response line"""
+        ready = self.reader.wait_for(lambda l: l.upper() == "READY", READY_TIMEOUT)
+        if ready is None:
+            print(f"[TIMEOUT] [{self.port}] No READY from reader; card ignored")
+            return False
+        self.reader.write_line(message)
+        return True
+
+    def stop(self):
+        self.running = False
+        if self.reader:
+            self.reader.stop()
+            self.reader.link.close()
 
-    try:
-        arduino = serial.Serial(arduino_port, baud_rate, timeout=2)
-        print(f"✅ Connected to {arduino_port}")
-    except serial.SerialException as e:
-        print(f"[ERROR] Serial port error: {e}")
+def main():
+    # Quotes come from memory; payments are written behind to Postgres
+    db = SessionStore(ParkingDatabase(), 'payment').start()
+    # One kiosk per reader, e.g. PAYMENT_PORTS=COM13,COM14
+    ports = [p.strip() for p in os.getenv('PAYMENT_PORTS', 'COM13').split(',') if p.strip()]
+
+    kiosks = []
+    for port in ports:
+        kiosk = PaymentKiosk(port, db)
+        if kiosk.connect():
+            kiosk.start()
+            kiosks.append(kiosk)
+    if not kiosks:
         return
 
     print("👋 Parking Management System Started")
-    print("📡 Waiting for card scan...\n")
 
     try:
-        while True:
-            if arduino.in_waiting > 0:
-                line = arduino.readline().decode('utf-8').strip()
-
-                if is_noise(line):
-                    continue
-
-                if ',' in line:
-                    try:
-                        plate_raw, balance_raw = line.split(',')
-                        plate = plate_raw.strip().replace('\x00', '')
-                        balance_cleaned = re.sub(r'[^\d]', '', balance_raw)
-
-                        if not balance_cleaned.isdigit():
-                            continue
-
-                        balance = int(balance_cleaned)
-                        print(f"\n🚗 Plate: {plate} | 💰 Balance: {balance} RWF")
-
-                        entry_time = db.get_unpaid_entry(plate)
-                        if not entry_time:
-                            print(f"⚠️ No unpaid entry found for {plate}")
-                            arduino.write(b"NO_UNPAID_ENTRY\n")
-                            continue
-
-                        exit_time = datetime.now()
-                        duration, amount_due = calculate_payment(entry_time, exit_time)
-                        print(f"⏱️ Duration: {int(duration)} mins | 🧾 Amount Due: {amount_due} RWF")
-
-                        new_balance = balance - amount_due
-                        if new_balance < 0:
-                            print("❌ Insufficient balance.")
-                            arduino.write(b"I\n")
-                            continue
-
-                        while True:
-                            ready_signal = arduino.readline().decode('utf-8').strip()
-                            if ready_signal.upper() == "READY":
-                                break
-
-                        arduino.write(f"{new_balance}\n".encode())
-                        print(f"✅ Payment success | 🔄 New Balance: {new_balance} RWF")
-
-                        db.update_payment(plate, amount_due)
-
-                    except Exception as e:
-                        print(f"[ERROR] {e}")
-
-            time.sleep(0.1)
+        while any(kiosk.is_alive() for kiosk in kiosks):
+            for kiosk in kiosks:
+                kiosk.join(timeout=1)
 
     except KeyboardInterrupt:
         print("\n[EXIT] Program terminated.")
 
     finally:
-        arduino.close()
+        for kiosk in kiosks:
+            kiosk.stop()
+        db.stop()
         print("[INFO] Serial port closed")
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+import sys
+from datetime import datetime, timedelta
+
+# Pre-aggregated statistics, kept current by the session writes in
+# database.py (_bump_stats / _bump_unauthorized):
+#   hourly_rollups        entries, exits, payments, revenue, dwell per hour
+#   unauthorized_rollups  unauthorized exit attempts per hour and gate
+#   daily_stats           the same totals per day, plus unauthorized attempts
+# backfill() recomputes them from the raw rows, for history or to repair drift.
+
+ROLLUP_TABLES = 'parking_counters, daily_stats, hourly_rollups, unauthorized_rollups'
+
+
+def _window(start, end):
+    """Day-aligned [start, end) bounds; None means unbounded"""
+    start = datetime(start.year, start.month, start.day) if start else '-infinity'
+    end = datetime(end.year, end.month, end.day) + timedelta(days=1) if end else 'infinity'
+    return {'start': start, 'end': end}
+
+
+def backfill_cursor(cursor, start=None, end=None):
+    """Rebuild every rollup for the days from ``start`` to ``end`` (default: all history).
+
+    Locks the rollup tables first, so concurrent gate writes wait and no
+    increment is lost or counted twice. Runs in the caller's transaction.
+    """
+    window = _window(start, end)
+    cursor.execute(f'LOCK TABLE {ROLLUP_TABLES} IN EXCLUSIVE MODE')
+
+    cursor.execute('''
+    DELETE FROM hourly_rollups
+    WHERE hour >= %(start)s::timestamp AND hour < %(end)s::timestamp
+    ''', window)
+    cursor.execute('''
+    INSERT INTO hourly_rollups (hour, entries, exits, payments, revenue, dwell_seconds)
+    SELECT date_trunc('hour', at), SUM(entries), SUM(exits), SUM(payments), SUM(revenue), SUM(dwell)
+    FROM (
+        SELECT entry_time AS at, 1 AS entries, 0 AS exits, 0 AS payments, 0 AS revenue, 0 AS dwell
+        FROM vehicles_all
+        WHERE entry_time >= %(start)s::timestamp AND entry_time < %(end)s::timestamp
+        UNION ALL
+        SELECT exit_time, 0, 1, 0, 0, EXTRACT(EPOCH FROM exit_time - entry_time)::bigint
+        FROM vehicles_all
+        WHERE exit_time >= %(start)s::timestamp AND exit_time < %(end)s::timestamp
+        UNION ALL
+        SELECT payment_time, 0, 0, 1, payment_amount, 0
+        FROM vehicles_all
+        WHERE payment_status = 1
+        AND payment_time >= %(start)s::timestamp AND payment_time < %(end)s::timestamp
+    ) events
+    GROUP BY 1
+    ''', window)
+
+    cursor.execute('''
+    DELETE FROM unauthorized_rollups
+    WHERE hour >= %(start)s::timestamp AND hour < %(end)s::timestamp
+    ''', window)
+    cursor.execute('''
+    INSERT INTO unauthorized_rollups (hour, gate_location, attempts)
+    SELECT date_trunc('hour', timestamp), gate_location, COUNT(*)
+    FROM unauthorized_exits
+    WHERE timestamp >= %(start)s::timestamp AND timestamp < %(end)s::timestamp
+    GROUP BY 1, 2
+    ''', window)
+
+    # Days are summed from the hours just rebuilt, so both levels agree
+    cursor.execute('''
+    DELETE FROM daily_stats
+    WHERE day >= %(start)s::timestamp AND day < %(end)s::timestamp
+    ''', window)
+    cursor.execute('''
+    INSERT INTO daily_stats (day, entries, exits, payments, revenue, dwell_seconds, unauthorized)
+    SELECT day, SUM(entries), SUM(exits), SUM(payments), SUM(revenue), SUM(dwell_seconds), SUM(unauthorized)
+    FROM (
+        SELECT hour::date AS day, entries, exits, payments, revenue, dwell_seconds, 0 AS unauthorized
+        FROM hourly_rollups
+        WHERE hour >= %(start)s::timestamp AND hour < %(end)s::timestamp
+        UNION ALL
+        SELECT hour::date, 0, 0, 0, 0, 0, attempts
+        FROM unauthorized_rollups
+        WHERE hour >= %(start)s::timestamp AND hour < %(end)s::timestamp
+    ) hours
+    GROUP BY day
+    ''', window)
+
+    cursor.execute('''
+    UPDATE parking_counters
+    SET occupancy = (SELECT COUNT(*) FROM vehicles WHERE exit_time IS NULL),
+        updated_at = now()
+    ''')
+
+
+def backfill(db, start=None, end=None):
+    """Rebuild the rollups for a date range (default: all history) in one transaction"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        backfill_cursor(cursor, start, end)
+        conn.commit()
+    print(f"[ROLLUP] Rebuilt rollups from {start or 'the beginning'} to {end or 'now'}")
+
+
+if __name__ == '__main__':
+    # python rollups.py                         -> rebuild all history
+    # python rollups.py 2025-01-01 [2025-03-31] -> rebuild a date range
+    from database import ParkingDatabase
+
+    dates = [datetime.strptime(arg, '%Y-%m-%d') for arg in sys.argv[1:3]]
+    backfill(ParkingDatabase(), *dates)
@@ -0,0 +1,78 @@
+import queue
+import threading
+import time
+
+import serial
+
+
+class SerialLineReader(threading.Thread):
+    """Dedicated reader thread that frames a serial stream into text lines.
+
+    The thread blocks in ``serial.read`` (woken by incoming bytes or the port
+    timeout), so consumers get each line as soon as it arrives instead of
+    polling ``in_waiting``.
+    """
+
+    def __init__(self, link, name=None, encoding='utf-8'):
+        super().__init__(daemon=True, name=name or f"reader-{link.port}")
+        self.link = link
+        self.encoding = encoding
+        self.lines = queue.Queue()
+        self.running = True
+        self.error = None
+        self._buffer = bytearray()
+        self._write_lock = threading.Lock()
+
+    def run(self):
+        while self.running:
+            try:
+                chunk = self.link.read(self.link.in_waiting or 1)
+            except (serial.SerialException, OSError) as e:
+                self.error = e
+                print(f"[SERIAL] {self.name}: read failed: {e}")
+                break
+            if not chunk:
+                continue
+            self._buffer.extend(chunk)
+            while b'\n' in self._buffer:
+                raw, _, rest = self._buffer.partition(b'\n')
+                self._buffer = bytearray(rest)
+                line = raw.decode(self.encoding, errors='ignore').strip().replace('\x00', '')
+                if line:
+                    self.lines.put(line)
+        self.running = False
+        self.lines.put(None)  # wake up anyone waiting for a line
+
+    def read_line(self, timeout=None):
+        """Next line, or None on timeout / when the port is gone"""
+        try:
+            return self.lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def wait_for(self, predicate, timeout):
+        """Read until a line satisfies ``predicate``; returns it or None on timeout.
+
+        Lines that do not match are discarded.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            line = self.read_line(remaining)
+            if line is None:
+                if not self.running:
+                    return None
+                continue
+            if predicate(line):
+                return line
+
+    def write_line(self, text):
+        with self._write_lock:
+            self.link.write(f"{text}\n".encode(self.encoding))
+            self.link.flush()
+
+    def stop(self):
+        self.running = False
+
@@ -0,0 +1,347 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+import psycopg2
+
+from database import UNAUTHORIZED_DEDUP_SECONDS
+from db_pool import PoolTimeout
+from parking_events import ParkingEventListener
+
+# One journal per gate process, e.g. journal/entry.jsonl
+JOURNAL_DIR = os.getenv('SESSION_JOURNAL_DIR', 'journal')
+# fsync every record before the gate acts on it; turn off only for testing
+JOURNAL_FSYNC = os.getenv('SESSION_JOURNAL_FSYNC', '1') == '1'
+# Entries and unauthorized attempts reach Postgres in multi-row batches of up
+# to BATCH_SIZE, collected for at most BATCH_LINGER seconds
+BATCH_SIZE = int(os.getenv('SESSION_BATCH_SIZE', '100'))
+BATCH_LINGER = float(os.getenv('SESSION_BATCH_LINGER', '0.2'))
+
+# Record types written with one multi-row INSERT per batch
+BATCHED_TYPES = ('entry', 'unauthorized')
+
+# Each store decides exits from its own copy of the open sessions, so two
+# stores (two exit processes, or lane_runner plus car_exit.py) can both let
+# the same paid plate out before the other one's exit NOTIFY arrives. Run
+# one store per site for exit authorization (lane_runner.py serves every
+# lane from one). The database still closes the session only once; the
+# write-behind exit that loses the race is logged, never turned into an
+# unauthorized attempt, because that gate already opened.
+
+
+class OpenSession:
+    """A vehicle currently inside: its latest entry and whether it has paid"""
+
+    __slots__ = ('plate', 'entry_time', 'paid')
+
+    def __init__(self, plate, entry_time, paid=False):
+        self.plate = plate
+        self.entry_time = entry_time
+        self.paid = paid
+
+
+def apply_event(sessions, kind, plate, when):
+    """Apply one entry/payment/exit to a plate -> OpenSession dict.
+
+    Idempotent, and events older than the session they would change are
+    ignored, so the same write can arrive from the journal and again from
+    NOTIFY in any order.
+    """
+    current = sessions.get(plate)
+    if kind == 'entry':
+        # The same entry again (a replay) must not reset ``paid``
+        if current is None or current.entry_time < when:
+            sessions[plate] = OpenSession(plate, when)
+    elif kind == 'payment':
+        if current is not None and current.entry_time <= when:
+            current.paid = True
+    elif kind == 'exit':
+        if current is not None and current.entry_time <= when:
+            del sessions[plate]
+
+
+class Journal:
+    """Append-only JSONL log of gate writes not yet applied to Postgres.
+
+    Records are flushed (and fsynced) before the gate acts on them, so a
+    crash loses nothing; each is dropped from the backlog once applied and
+    the file is truncated whenever the backlog is empty.
+    """
+
+    def __init__(self, path, fsync=JOURNAL_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        torn = False
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self.pending.append(json.loads(line))
+                    except ValueError:
+                        torn = True  # half-written last record from a crash
+        if torn:
+            print(f"[JOURNAL] Dropped a torn record from {path}")
+            self._rewrite()
+        self.file = open(path, 'a', encoding='utf-8')
+        if self.pending:
+            print(f"[JOURNAL] {len(self.pending)} write(s) from a previous run to replay")
+
+    def _rewrite(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for op in self.pending:
+                f.write(json.dumps(op) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def append(self, op):
+        with self.lock:
+            self.file.write(json.dumps(op) + '\n')
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+            self.pending.append(op)
+            self.ready.notify()
+
+    def next_batch(self, timeout, max_size=BATCH_SIZE, linger=BATCH_LINGER):
+        """Oldest unapplied records of one type, up to ``max_size``.
+
+        Waits up to ``timeout`` for a first record, then up to ``linger``
+        for more of a batchable type to arrive. Other types come one at a
+        time. Returns [] on timeout.
+        """
+        with self.lock:
+            if not self.pending:
+                self.ready.wait(timeout)
+            if not self.pending:
+                return []
+            kind = self.pending[0]['type']
+            if kind not in BATCHED_TYPES:
+                return [self.pending[0]]
+            deadline = time.monotonic() + linger
+            while len(self.pending) < max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.ready.wait(remaining):
+                    break
+            batch = []
+            for op in self.pending:
+                if op['type'] != kind or len(batch) == max_size:
+                    break
+                batch.append(op)
+            return batch
+
+    def done(self, ops, rejected=False):
+        """Drop applied (or rejected) records from the head of the backlog"""
+        with self.lock:
+            for op in ops:
+                if self.pending and self.pending[0] is op:
+                    self.pending.popleft()
+            if rejected:
+                with open(self.path + '.rejected', 'a', encoding='utf-8') as f:
+                    for op in ops:
+                        f.write(json.dumps(op) + '\n')
+            if not self.pending:
+                self.file.truncate(0)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.pending)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def close(self):
+        self.file.close()
+
+
+class SessionStore:
+    """Answers gate decisions from an in-memory index of open sessions.
+
+    The index (plate -> entry time, paid) is loaded from ``vehicles`` and
+    kept current by the parking_events NOTIFY channel; it is reloaded after
+    every listener reconnect. Writes go to memory and a durable journal
+    first and are applied to Postgres by a background thread, retried until
+    the database is back. Journal replays are idempotent (applied_ops).
+
+    The method names match ParkingDatabase, so the store can be passed
+    wherever a gate script used the database. Writes from other processes
+    become visible here once they reach Postgres.
+    """
+
+    def __init__(self, db, name, journal_path=None, retry_seconds=2.0):
+        self.db = db
+        self.name = name
+        self.retry_seconds = retry_seconds
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.warmed = threading.Event()
+        self.journal = Journal(journal_path or os.path.join(JOURNAL_DIR, f"{name}.jsonl"))
+        self.listener = ParkingEventListener(db.conn_params, self._on_event, on_connect=self.warm)
+        self.recent_denials = {}  # (plate, gate) -> monotonic time of the logged denial
+        self.suppressed_denials = 0
+        self.running = True
+        # The journal may hold writes from before a restart
+        for op in self.journal.snapshot():
+            self._apply(op)
+
+    def start(self, warm_timeout=5.0):
+        threading.Thread(target=self.listener.run, daemon=True, name=f"{self.name}-listener").start()
+        threading.Thread(target=self._drain, daemon=True, name=f"{self.name}-journal").start()
+        if not self.warmed.wait(warm_timeout):
+            print(f"[SESSIONS] {self.name}: database not reachable yet; answering from the journal only")
+        return self
+
+    def warm(self):
+        """Reload open sessions from Postgres, then re-apply writes it has not seen yet"""
+        before = self.journal.snapshot()
+        try:
+            rows = self.db.get_open_sessions()
+        except (psycopg2.Error, PoolTimeout) as e:
+            print(f"[SESSIONS] {self.name}: warm-up failed: {e}")
+            return False
+        sessions = {plate: OpenSession(plate, entry_time, paid) for plate, entry_time, paid in rows}
+        with self.lock:
+            seen = set()
+            for op in before + self.journal.snapshot():
+                if op['id'] not in seen:
+                    seen.add(op['id'])
+                    apply_event(sessions, op['type'], op['plate_number'],
+                                datetime.fromisoformat(op['timestamp']))
+            self.sessions = sessions
+        self.warmed.set()
+        print(f"[SESSIONS] {self.name}: {len(sessions)} open session(s) loaded")
+        return True
+
+    def _on_event(self, event):
+        with self.lock:
+            apply_event(self.sessions, event['type'], event['plate_number'],
+                        datetime.fromisoformat(event['timestamp']))
+
+    def _apply(self, op):
+        apply_event(self.sessions, op['type'], op['plate_number'],
+                    datetime.fromisoformat(op['timestamp']))
+
+    def _record(self, kind, plate_number, when=None, **fields):
+        """Journal a write and apply it to memory; call with self.lock held"""
+        op = dict(id=uuid.uuid4().hex, type=kind, plate_number=plate_number,
+                  timestamp=(when or datetime.now()).isoformat(), **fields)
+        self.journal.append(op)
+        self._apply(op)
+
+    # Same interface as ParkingDatabase for the gate paths
+
+    def add_vehicle_entry(self, plate_number):
+        with self.lock:
+            self._record('entry', plate_number)
+
+    def get_unpaid_entry(self, plate_number):
+        with self.lock:
+            session = self.sessions.get(plate_number)
+            return session.entry_time if session and not session.paid else None
+
+    def update_payment(self, plate_number, amount, payment_time=None):
+        with self.lock:
+            self._record('payment', plate_number, payment_time, amount=float(amount))
+
+    def record_unauthorized_exit(self, plate_number, gate_location):
+        # Repeats are dropped here and, across stores, again by the database
+        with self.lock:
+            if self._first_denial(plate_number, gate_location):
+                self._record('unauthorized', plate_number, gate_location=gate_location)
+
+    def authorize_exit(self, plate_number, gate_location):
+        """True (and the session is closed) if the plate has a paid open session"""
+        with self.lock:
+            session = self.sessions.get(plate_number)
+            allowed = session is not None and session.paid
+            if allowed:
+                self._record('exit', plate_number, gate_location=gate_location)
+            elif self._first_denial(plate_number, gate_location):
+                self._record('unauthorized', plate_number, gate_location=gate_location)
+        return allowed
+
+    def _first_denial(self, plate_number, gate_location):
+        """False for a repeat denial inside the dedup window; call with self.lock held"""
+        now = time.monotonic()
+        key = (plate_number, gate_location)
+        last = self.recent_denials.get(key)
+        if last is not None and now - last < UNAUTHORIZED_DEDUP_SECONDS:
+            self.suppressed_denials += 1
+            return False
+        self.recent_denials = {k: t for k, t in self.recent_denials.items()
+                               if now - t < UNAUTHORIZED_DEDUP_SECONDS}
+        self.recent_denials[key] = now
+        return True
+
+    def _write(self, ops):
+        kind = ops[0]['type']
+        if kind == 'entry':
+            self.db.add_vehicle_entries([
+                (op['plate_number'], datetime.fromisoformat(op['timestamp']), op['id'])
+                for op in ops])
+        elif kind == 'unauthorized':
+            self.db.record_unauthorized_exits([
+                (op['plate_number'], op['gate_location'], datetime.fromisoformat(op['timestamp']), op['id'])
+                for op in ops])
+        elif kind == 'payment':
+            op = ops[0]
+            self.db.update_payment(op['plate_number'], op['amount'],
+                                   datetime.fromisoformat(op['timestamp']), op_id=op['id'])
+        elif kind == 'exit':
+            op = ops[0]
+            # The gate already opened: replay the close, never log a denial
+            closed = self.db.authorize_exit(op['plate_number'], op['gate_location'],
+                                            exit_time=datetime.fromisoformat(op['timestamp']),
+                                            op_id=op['id'], deny=False)
+            if closed is False:
+                print(f"[SESSIONS] {self.name}: exit of {op['plate_number']} at {op['gate_location']} "
+                      f"found no paid open session (already exited at another gate?)")
+        else:
+            raise ValueError(f"Unknown journal record: {kind}")
+
+    def _apply_batch(self, ops):
+        """Write ops to Postgres -> False if the database is unreachable.
+
+        If a batch is refused, its records are retried one by one and only
+        the ones that fail on their own go to the .rejected file.
+        """
+        try:
+            self._write(ops)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeout) as e:
+            print(f"[SESSIONS] {self.name}: database unavailable, "
+                  f"{len(self.journal)} write(s) queued: {e}")
+            return False
+        except (psycopg2.Error, ValueError) as e:
+            if len(ops) > 1:
+                print(f"[SESSIONS] {self.name}: batch of {len(ops)} refused ({str(e).strip()}); retrying one by one")
+                return all(self._apply_batch([op]) for op in ops)
+            print(f"[SESSIONS] {self.name}: rejected {ops[0]['type']} record {ops[0]['id']}: {str(e).strip()}")
+            self.journal.done(ops, rejected=True)
+            return True
+        self.journal.done(ops)
+        return True
+
+    def _drain(self):
+        while self.running:
+            ops = self.journal.next_batch(timeout=1.0)
+            if ops and not self._apply_batch(ops):
+                time.sleep(self.retry_seconds)
+
+    def stop(self, flush_timeout=5.0):
+        """Give queued writes ``flush_timeout`` seconds to drain, then stop"""
+        deadline = time.monotonic() + flush_timeout
+        while len(self.journal) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.running = False
+        self.listener.stop()
+        if len(self.journal):
+            print(f"[SESSIONS] {self.name}: {len(self.journal)} write(s) left in {self.journal.path}")
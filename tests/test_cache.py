@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from dashboard.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_callers_share_one_load():
+    cache = TTLCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return 'stats'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_load('stats', loader)))
+    leader.start()
+    started.wait(2)
+    follower = threading.Thread(target=lambda: results.append(cache.get_or_load('stats', loader)))
+    follower.start()
+    # The follower is waiting on the leader's flight before the load finishes
+    while cache.stats()['stats']['coalesced'] == 0:
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+    assert results == ['stats', 'stats']
+    assert len(calls) == 1
+
+
+def test_load_invalidated_midway_is_not_stored():
+    cache = TTLCache()
+    values = iter(['stale', 'fresh'])
+
+    def loader():
+        value = next(values)
+        if value == 'stale':
+            cache.invalidate('stats')  # a write landed while the query ran
+        return value
+
+    assert cache.get_or_load('stats', loader) == 'stale'
+    assert cache.get_or_load('stats', loader) == 'fresh'
+    assert cache.get_or_load('stats', loader) == 'fresh'
+    assert cache.stats()['stats']['misses'] == 2
+
+
+def test_entries_expire_after_their_ttl():
+    clock = Clock()
+    cache = TTLCache(default_ttl=10, clock=clock)
+    counter = iter(range(10))
+    load = lambda: next(counter)
+    assert cache.get_or_load('stats', load) == 0
+    clock.now = 9.9
+    assert cache.get_or_load('stats', load) == 0
+    clock.now = 10.1
+    assert cache.get_or_load('stats', load) == 1
+    assert cache.get_or_load('feed', load, ttl=1) == 2
+    clock.now = 11.2
+    assert cache.get_or_load('feed', load, ttl=1) == 3
+
+
+def test_failed_load_is_raised_and_not_cached():
+    cache = TTLCache()
+
+    def broken():
+        raise RuntimeError("database down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            cache.get_or_load('stats', broken)
+    assert cache.stats()['stats']['errors'] == 2
@@ -0,0 +1,119 @@
+import time
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+import db_pool
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.queries.append(sql)
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = 0
+        self.broken = False
+        self.queries = []
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Stubs psycopg2.connect; every connection it opened, in order"""
+    opened = []
+
+    def connect(**params):
+        opened.append(FakeConnection(len(opened)))
+        return opened[-1]
+
+    monkeypatch.setattr(db_pool.psycopg2, 'connect', connect)
+    return opened
+
+
+def test_connections_are_reused(connections):
+    pool = ConnectionPool({}, minconn=1, maxconn=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second and len(connections) == 1
+
+
+def test_idle_connection_is_checked_and_replaced_when_dead(connections):
+    pool = ConnectionPool({}, minconn=1, health_check_interval=30)
+    with pool.connection() as conn:
+        assert conn is connections[0]
+    assert connections[0].queries == []  # recently used: no round trip
+    connections[0].broken = True
+    pool._idle = [(conn, time.monotonic() - 60)]  # idle past the check interval
+    with pool.connection() as conn:
+        assert conn is connections[1]
+    assert connections[0].queries == ['SELECT 1'] and connections[0].closed
+
+
+def test_checkout_times_out_when_exhausted(connections):
+    pool = ConnectionPool({}, minconn=0, maxconn=1, timeout=0.05)
+    held = pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    pool.putconn(held)
+    assert pool.getconn() is held
+
+
+def test_broken_connection_is_discarded_not_pooled(connections):
+    pool = ConnectionPool({}, minconn=0, maxconn=1)
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as conn:
+            raise psycopg2.OperationalError("connection reset")
+    assert conn.closed
+    with pool.connection() as replacement:
+        assert replacement is not conn
+    assert pool._in_use == 0
+
+
+def test_open_transaction_is_rolled_back_on_return(connections):
+    pool = ConnectionPool({}, minconn=0)
+    with pool.connection() as conn:
+        conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    assert conn.status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    assert pool._idle[0][0] is conn
+
+
+def test_failed_connect_frees_the_slot(connections, monkeypatch):
+    pool = ConnectionPool({}, minconn=0, maxconn=1, connect_retries=1)
+
+    def refuse(**params):
+        raise psycopg2.OperationalError("could not connect to server")
+
+    monkeypatch.setattr(db_pool.psycopg2, 'connect', refuse)
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert pool._in_use == 0
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from detector_backends import (Detector, ExportedDetector, decode_yolov8, letterbox,
+                               unletterbox)
+
+
+def head(*anchors, classes=2):
+    """Raw YOLOv8 output (4 + classes, anchors) from (cx, cy, w, h, class, score) rows"""
+    output = np.zeros((4 + classes, len(anchors)), np.float32)
+    for column, (cx, cy, w, h, cls, score) in enumerate(anchors):
+        output[:4, column] = (cx, cy, w, h)
+        output[4 + cls, column] = score
+    return output
+
+
+def test_letterbox_scales_and_centres_the_frame():
+    frame = np.full((360, 480, 3), 255, np.uint8)
+    image, scale, (pad_x, pad_y) = letterbox(frame, 640)
+    assert image.shape == (640, 640, 3)
+    assert scale == pytest.approx(640 / 480)
+    assert (pad_x, pad_y) == (0, 80)
+    assert image[79, 320].tolist() == [114, 114, 114]
+    assert image[80, 320].tolist() == [255, 255, 255]
+
+
+def test_boxes_round_trip_to_frame_coordinates():
+    frame = np.zeros((360, 480, 3), np.uint8)
+    _, scale, pad = letterbox(frame, 640)
+    x1, y1, x2, y2 = 100, 50, 220, 90
+    boxed = (x1 * scale + pad[0], y1 * scale + pad[1], x2 * scale + pad[0], y2 * scale + pad[1], 0.9)
+    [box] = unletterbox([boxed], scale, pad, frame.shape)
+    # Truncated to int like ultralytics' result_boxes, so float error may cost a pixel
+    assert np.abs(np.subtract(box, (x1, y1, x2, y2))).max() <= 1
+    # Boxes reaching into the padding are clipped to the frame
+    assert unletterbox([(-10, 0, 700, 700, 0.9)], scale, pad, frame.shape) == [(0, 0, 480, 360)]
+
+
+def test_nms_suppresses_within_a_class_only():
+    output = head((100, 100, 40, 20, 0, 0.9),
+                  (102, 101, 40, 20, 0, 0.8),   # same plate again: suppressed
+                  (101, 100, 40, 20, 1, 0.7),   # same place, other class: kept
+                  (300, 300, 40, 20, 0, 0.1))   # below conf
+    detections = decode_yolov8(output, conf=0.25)
+    assert len(detections) == 2
+    assert [round(score, 2) for *_, score in detections] == [0.9, 0.7]
+    assert detections[0][:4] == pytest.approx((80, 90, 120, 110))
+    assert detections[1][:4] == pytest.approx((81, 90, 121, 110))
+
+
+def test_nothing_above_conf_gives_no_boxes():
+    assert decode_yolov8(head((100, 100, 40, 20, 0, 0.2)), conf=0.25) == []
+
+
+class OneBoxPerImage(ExportedDetector):
+    """Puts a box at the centre of every letterboxed image"""
+
+    name = 'fake'
+
+    def _forward(self, blob):
+        size = blob.shape[-1]
+        return np.stack([head((size / 2, size / 2, 64, 32, 0, 0.9)) for _ in blob])
+
+
+def test_exported_detector_maps_each_image_of_a_batch():
+    detector = OneBoxPerImage('fake.onnx', image_size=320)
+    frames = [np.zeros((240, 320, 3), np.uint8), np.zeros((480, 320, 3), np.uint8)]
+    assert detector.detect_batch(frames) == [[(128, 104, 192, 136)], [(112, 216, 208, 264)]]
+    assert detector.detect(frames[0]) == [(128, 104, 192, 136)]
+
+
+def test_backends_must_implement_the_model_call():
+    with pytest.raises(TypeError):
+        Detector('model.pt')
+    with pytest.raises(TypeError):
+        ExportedDetector('model.onnx')
@@ -0,0 +1,104 @@
+import time
+
+import serial
+
+from gate_controller import ALARM, CLOSE, OPEN, FakeSerial, GateController
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class BrokenSerial(FakeSerial):
+    def write(self, data):
+        raise serial.SerialException("device unplugged")
+
+
+def test_open_writes_command_and_acknowledges():
+    link = FakeSerial()
+    gate = GateController(link, hold_seconds=5)
+    try:
+        assert gate.open().wait(1)
+        assert link.written == [b'1']
+        assert gate.state == OPEN
+    finally:
+        gate.shutdown(close_gate=False)
+
+
+def test_open_closes_itself_after_hold():
+    link = FakeSerial()
+    gate = GateController(link, hold_seconds=0.1)
+    try:
+        gate.open().wait(1)
+        assert wait_until(lambda: gate.state == CLOSE)
+        assert link.written == [b'1', b'0']
+    finally:
+        gate.shutdown(close_gate=False)
+
+
+def test_second_open_extends_hold_and_ignores_stale_auto_close():
+    link = FakeSerial()
+    gate = GateController(link, hold_seconds=0.3)
+    try:
+        gate.open().wait(1)
+        time.sleep(0.2)
+        gate.open().wait(1)
+        # The first open's auto-close is due now, but the gate stays up
+        time.sleep(0.2)
+        assert gate.state == OPEN
+        assert link.written == [b'1']
+        assert wait_until(lambda: gate.state == CLOSE)
+        time.sleep(0.1)
+        assert link.written == [b'1', b'0']
+    finally:
+        gate.shutdown(close_gate=False)
+
+
+def test_explicit_close_cancels_auto_close():
+    link = FakeSerial()
+    gate = GateController(link, hold_seconds=0.2)
+    try:
+        gate.open().wait(1)
+        gate.close().wait(1)
+        time.sleep(0.3)
+        assert link.written == [b'1', b'0']
+    finally:
+        gate.shutdown(close_gate=False)
+
+
+def test_alarm_does_not_change_state():
+    link = FakeSerial()
+    gate = GateController(link)
+    try:
+        assert gate.alarm().wait(1)
+        assert link.written == [b'2']
+        assert gate.state == CLOSE
+    finally:
+        gate.shutdown(close_gate=False)
+
+
+def test_failed_write_is_reported_on_the_command():
+    gate = GateController(BrokenSerial())
+    try:
+        command = gate.submit(ALARM)
+        assert not command.wait(1)
+        assert isinstance(command.error, serial.SerialException)
+        # The worker survives and keeps taking commands
+        assert gate.is_alive()
+    finally:
+        gate.shutdown(close_gate=False)
+
+
+def test_shutdown_closes_gate_and_link():
+    link = FakeSerial()
+    gate = GateController(link, hold_seconds=5)
+    gate.open().wait(1)
+    gate.shutdown()
+    assert link.written == [b'1', b'0']
+    assert link.closed
+    assert not gate.is_alive()
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from inference_service import InferenceService
+
+
+class EchoModel:
+    """Returns one box per frame built from the frame's value"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def detect_batch(self, frames, conf=None):
+        self.batch_sizes.append(len(frames))
+        return [[(frame, frame, frame + 1, frame + 1)] for frame in frames]
+
+
+class FailingModel:
+    def detect_batch(self, frames, conf=None):
+        raise RuntimeError("forward pass failed")
+
+
+def test_each_caller_gets_its_own_boxes():
+    model = EchoModel()
+    service = InferenceService(model, max_batch=4, max_latency_ms=50)
+    service.start()
+    results, lock = {}, threading.Lock()
+
+    def caller(value):
+        boxes = service.detect(value, timeout=2)
+        with lock:
+            results[value] = boxes
+
+    threads = [threading.Thread(target=caller, args=(value,)) for value in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    service.stop()
+    assert results == {value: [(value, value, value + 1, value + 1)] for value in range(8)}
+    assert max(model.batch_sizes) <= 4
+    assert sum(row['frames'] for row in service.stats().values()) == 8
+
+
+def test_start_raises_when_the_model_cannot_load():
+    class Broken(InferenceService):
+        @property
+        def model(self):
+            raise FileNotFoundError("no model")
+
+    with pytest.raises(FileNotFoundError):
+        Broken().start()
+
+
+def test_failed_batch_is_reported_to_its_callers_only():
+    service = InferenceService(FailingModel(), max_latency_ms=1)
+    service.start()
+    with pytest.raises(RuntimeError, match="forward pass failed"):
+        service.detect(1, timeout=2)
+    assert service.is_alive()
+    service.stop()
+
+
+def test_requests_fail_instead_of_hanging_when_the_thread_dies():
+    service = InferenceService(EchoModel(), max_latency_ms=1)
+
+    def crash():
+        raise MemoryError("out of memory")
+
+    service._collect = crash
+    service.start()
+    service.join(2)
+    assert not service.is_alive()
+    with pytest.raises(RuntimeError):
+        service.detect(1, timeout=2)
@@ -0,0 +1,38 @@
+import pytest
+
+from lane_runner import load_lanes
+
+ENTRY = "  - {name: entry-1, role: entry, camera: 0, location: Main Entrance}\n"
+EXIT = "  - {name: exit-1, role: exit, camera: 1, location: Main Exit}\n"
+
+
+def write_config(tmp_path, text):
+    path = tmp_path / 'lanes.yaml'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_valid_config_is_loaded(tmp_path):
+    lanes = load_lanes(write_config(tmp_path, "lanes:\n" + ENTRY + EXIT))
+    assert [(lane['name'], lane['role']) for lane in lanes] == [('entry-1', 'entry'), ('exit-1', 'exit')]
+
+
+@pytest.mark.parametrize('text, message', [
+    ("", "no lanes configured"),
+    ("lanes: []\n", "no lanes configured"),
+    ("lanes:\n  - {name: exit-1, camera: 1}\n", "has no 'role'"),
+    ("lanes:\n  - {role: exit, camera: 1}\n", "has no 'name'"),
+    ("lanes:\n  - {name: exit-1, role: exit}\n", "has no 'camera'"),
+    ("lanes:\n  - {name: gate-1, role: both, camera: 0}\n", "unknown role 'both'"),
+    ("lanes:\n  - {name: exit-1, role: exit, camera: 1, location: North Car Park Exit}\n",
+     "longer than 10 characters"),
+    ("lanes:\n" + EXIT + EXIT, "'exit-1' is used twice"),
+])
+def test_invalid_config_is_rejected(tmp_path, text, message):
+    with pytest.raises(ValueError, match=message):
+        load_lanes(write_config(tmp_path, text))
+
+
+def test_long_location_is_fine_on_an_entry_lane(tmp_path):
+    text = "lanes:\n  - {name: entry-1, role: entry, camera: 0, location: North Car Park Entrance}\n"
+    assert load_lanes(write_config(tmp_path, text))[0]['location'] == 'North Car Park Entrance'
@@ -0,0 +1,54 @@
+import numpy as np
+
+from motion_gate import MotionGate
+
+
+def scene(shade=60):
+    return np.full((240, 320, 3), shade, np.uint8)
+
+
+def with_car(shade=60):
+    frame = scene(shade)
+    frame[80:200, 100:260] = 220
+    return frame
+
+
+def test_first_frame_runs_then_static_scene_is_skipped_after_hold():
+    gate = MotionGate(hold_seconds=2.0)
+    assert gate.should_run(scene(), now=0)
+    assert gate.should_run(scene(), now=1.9)   # still inside the hold time
+    assert not gate.should_run(scene(), now=2.1)
+    assert (gate.checked, gate.skipped) == (3, 1)
+
+
+def test_motion_restarts_detection_and_holds_it():
+    gate = MotionGate(hold_seconds=2.0)
+    gate.should_run(scene(), now=0)
+    assert not gate.should_run(scene(), now=5)
+    assert gate.should_run(with_car(), now=6)
+    # The car stopped moving: detection keeps running for the hold time
+    assert gate.should_run(with_car(), now=7.5)
+    assert gate.motion_ratio(with_car()) > gate.min_changed
+
+
+def test_busy_forces_detection_on_a_static_scene():
+    gate = MotionGate(hold_seconds=2.0)
+    gate.should_run(scene(), now=0)
+    assert not gate.should_run(scene(), now=10)
+    assert gate.should_run(scene(), busy=True, now=11)
+    assert gate.skipped == 1
+
+
+def test_background_adapts_to_a_parked_car():
+    gate = MotionGate(learning_rate=0.5)
+    gate.motion_ratio(scene())
+    ratios = [gate.motion_ratio(with_car()) for _ in range(12)]
+    assert ratios[0] > 0.2
+    assert ratios[-1] < gate.min_changed
+    assert not gate.should_run(with_car(), now=100)
+
+
+def test_small_lighting_changes_are_not_motion():
+    gate = MotionGate()
+    gate.motion_ratio(scene(60))
+    assert gate.motion_ratio(scene(70)) == 0.0
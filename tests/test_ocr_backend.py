@@ -0,0 +1,46 @@
+import numpy as np
+
+from ocr_backend import TILE_GAP, TILE_HEIGHT, build_mosaic, group_words_by_tile
+
+
+def crops():
+    """A wide BGR plate, a small grayscale one and a square one, each one flat shade"""
+    return [np.full((40, 200, 3), 10, np.uint8),
+            np.full((16, 48), 20, np.uint8),
+            np.full((30, 30, 3), 30, np.uint8)]
+
+
+def test_mosaic_stacks_resized_tiles_with_gaps():
+    mosaic, spans = build_mosaic(crops())
+    assert spans == [(TILE_GAP + i * (TILE_HEIGHT + TILE_GAP),
+                      TILE_GAP + i * (TILE_HEIGHT + TILE_GAP) + TILE_HEIGHT) for i in range(3)]
+    widths = [320, 192, 64]  # width scaled to TILE_HEIGHT, aspect kept
+    assert mosaic.shape == (3 * (TILE_HEIGHT + TILE_GAP) + TILE_GAP, max(widths) + 2 * TILE_GAP)
+    for (top, bottom), width, shade in zip(spans, widths, (10, 20, 30)):
+        tile = mosaic[top:bottom, TILE_GAP:TILE_GAP + width]
+        assert (tile == shade).all()
+        assert (mosaic[top:bottom, TILE_GAP + width:] == 255).all()
+        assert (mosaic[top - TILE_GAP:top] == 255).all()
+
+
+def test_words_go_to_the_tile_they_overlap():
+    _, spans = build_mosaic(crops())
+    (top0, bottom0), (top1, bottom1), _ = spans
+    words = [
+        ('RAB', 90.0, top0 + 5, bottom0 - 5),
+        ('123C', 80.0, top0 + 10, bottom0),
+        ('RAD456E', 70.0, top1, bottom1),
+    ]
+    assert group_words_by_tile(words, spans) == [('RAB 123C', 85.0), ('RAD456E', 70.0), ('', 0.0)]
+
+
+def test_words_in_a_gap_go_to_the_nearest_tile():
+    _, spans = build_mosaic(crops())
+    boundary = spans[0][1] + TILE_GAP // 2  # halfway between tiles 0 and 1
+    words = [
+        ('A', 50.0, boundary - 3, boundary + 1),   # centre just above the halfway line
+        ('B', 60.0, boundary - 2, boundary + 2),   # centre on it: belongs to the next tile
+        ('C', 70.0, 18, 22),                       # above the first tile, within half a gap
+        ('D', 40.0, 10_000, 10_010),               # below every tile: dropped
+    ]
+    assert group_words_by_tile(words, spans) == [('A C', 60.0), ('B', 60.0), ('', 0.0)]
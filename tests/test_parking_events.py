@@ -0,0 +1,56 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import parking_events
+from parking_events import ParkingEventListener
+
+
+class BusyConnection:
+    """Always has a notification waiting; the leader lock frees up after a while"""
+
+    def __init__(self, lock_free_at):
+        self.lock_free_at = lock_free_at
+        self.notifies = []
+        self.lock_attempts = 0
+
+    def set_session(self, autocommit):
+        pass
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        if 'pg_try_advisory_lock' in sql:
+            self.lock_attempts += 1
+
+    def fetchone(self):
+        return (time.monotonic() >= self.lock_free_at,)
+
+    def poll(self):
+        payload = json.dumps({'type': 'entry', 'plate_number': 'RAB123C'})
+        self.notifies.append(SimpleNamespace(payload=payload))
+
+    def close(self):
+        pass
+
+
+def test_follower_takes_over_while_events_keep_arriving(monkeypatch):
+    conn = BusyConnection(lock_free_at=time.monotonic() + 0.2)
+    monkeypatch.setattr(parking_events.psycopg2, 'connect', lambda **params: conn)
+    # select never times out: there is always traffic
+    monkeypatch.setattr(parking_events, 'select',
+                        SimpleNamespace(select=lambda r, w, x, timeout: (r, [], [])))
+    events = []
+    listener = ParkingEventListener({}, events.append, poll_seconds=0.05, leader_lock_id=1)
+    thread = threading.Thread(target=listener.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 2
+    while not listener.is_leader and time.monotonic() < deadline:
+        time.sleep(0.01)
+    became_leader = listener.is_leader
+    listener.stop()
+    thread.join(1)
+    assert became_leader
+    assert conn.lock_attempts > 1 and events
@@ -0,0 +1,182 @@
+import queue
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import process_payment
+from process_payment import PaymentKiosk, parse_card_line
+from serial_protocol import SerialLineReader
+
+
+class ReaderLink:
+    """Fake serial port for the payment.ino sketch.
+
+    ``scan`` prints the card line and READY like the sketch does; whatever the
+    PC writes back is answered the same way (I -> denied, a number -> card
+    written, DONE). Output is delivered in small chunks with CRLF endings.
+    """
+
+    port = 'FAKE'
+
+    def __init__(self, chunk=5, write_card=True):
+        self.chunk = chunk
+        self.write_card = write_card
+        self.incoming = queue.Queue()
+        self.buffer = b''
+        self.written = []
+
+    def send(self, *lines):
+        data = b''.join(line.encode() + b'\r\n' for line in lines)
+        for start in range(0, len(data), self.chunk):
+            self.incoming.put(data[start:start + self.chunk])
+
+    def scan(self, plate, balance):
+        self.send(f"{plate},{balance}", "READY")
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def read(self, size=1):
+        if not self.buffer:
+            try:
+                self.buffer = self.incoming.get(timeout=0.05)
+            except queue.Empty:
+                return b''
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def write(self, data):
+        self.written.append(data)
+        response = data.decode().strip()
+        self.send(f"[RECEIVED FROM PC]: {response}")
+        if response == 'I':
+            self.send("[DENIED] Insufficient balance")
+        elif self.write_card:
+            self.send("[WRITING] New balance to card...", "DONE", f"[UPDATED] New Balance: {response}")
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Sessions:
+    def __init__(self, parked_minutes=10):
+        self.entry_time = datetime.now() - timedelta(minutes=parked_minutes) if parked_minutes else None
+        self.payments = []
+
+    def get_unpaid_entry(self, plate):
+        return self.entry_time
+
+    def update_payment(self, plate, amount, payment_time=None):
+        self.payments.append((plate, amount))
+
+
+def start_kiosk(link, db):
+    kiosk = PaymentKiosk(link.port, db)
+    kiosk.reader = SerialLineReader(link)
+    kiosk.reader.start()
+    kiosk.start()
+    return kiosk
+
+
+def wait_until(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not condition():
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('RAB123C,5000', ('RAB123C', 5000)),
+    ('RAB123C\x00\x00, 5000\r', ('RAB123C', 5000)),
+    ('RAB123C,', None),
+    (',5000', None),
+    ('READY', None),
+])
+def test_parse_card_line(line, expected):
+    assert parse_card_line(line) == expected
+
+
+def test_reader_frames_partial_crlf_lines():
+    link = ReaderLink(chunk=3)
+    reader = SerialLineReader(link)
+    reader.start()
+    link.send("RAB123C,5000", "", "\x00", "READY")
+    try:
+        assert reader.read_line(1) == 'RAB123C,5000'
+        assert reader.read_line(1) == 'READY'
+        assert reader.read_line(0.2) is None
+    finally:
+        reader.stop()
+
+
+def test_wait_for_skips_unexpected_lines_and_times_out():
+    link = ReaderLink()
+    reader = SerialLineReader(link)
+    reader.start()
+    link.send("Place your card near the reader...", "[TIMEOUT] No response", "READY")
+    try:
+        assert reader.wait_for(lambda line: line == 'READY', 1) == 'READY'
+        assert reader.wait_for(lambda line: line == 'DONE', 0.2) is None
+    finally:
+        reader.stop()
+
+
+def test_paid_when_the_card_is_written():
+    link, db = ReaderLink(), Sessions(parked_minutes=10)
+    kiosk = start_kiosk(link, db)
+    link.send("==== PAYMENT MODE RFID ====")
+    link.scan('RAB123C', 5000)
+    try:
+        assert wait_until(lambda: db.payments)
+        plate, amount = db.payments[0]
+        assert plate == 'RAB123C' and amount in (50, 51)  # 5 RWF per minute
+        assert link.written == [f"{5000 - amount}\n".encode()]
+    finally:
+        kiosk.stop()
+
+
+def test_insufficient_balance_is_refused():
+    link, db = ReaderLink(), Sessions(parked_minutes=10)
+    kiosk = start_kiosk(link, db)
+    link.scan('RAB123C', 20)
+    try:
+        assert wait_until(lambda: link.written)
+        assert link.written == [b'I\n']
+        time.sleep(0.2)
+        assert db.payments == []
+    finally:
+        kiosk.stop()
+
+
+def test_no_unpaid_entry_is_refused():
+    link, db = ReaderLink(), Sessions(parked_minutes=None)
+    kiosk = start_kiosk(link, db)
+    link.scan('RAB123C', 5000)
+    try:
+        assert wait_until(lambda: link.written)
+        assert link.written == [b'I\n']
+        assert db.payments == []
+    finally:
+        kiosk.stop()
+
+
+def test_payment_not_recorded_without_done(monkeypatch):
+    monkeypatch.setattr(process_payment, 'DONE_TIMEOUT', 0.3)
+    link, db = ReaderLink(write_card=False), Sessions(parked_minutes=10)
+    kiosk = start_kiosk(link, db)
+    link.scan('RAB123C', 5000)
+    try:
+        assert wait_until(lambda: link.written)
+        time.sleep(0.6)
+        assert db.payments == []
+        # The kiosk is back to waiting for the next card
+        link.scan('RAB123C', 5000)
+        assert wait_until(lambda: len(link.written) == 2)
+    finally:
+        kiosk.stop()
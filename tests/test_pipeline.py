@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+
+from pipeline import DetectionPipeline
+
+
+class StubGrabber:
+    """Hands out a new blank frame on every read until stopped"""
+
+    name = 'stub'
+
+    def __init__(self):
+        self.running = True
+        self.seq = 0
+
+    def start(self):
+        pass
+
+    def read(self, after_seq=0, timeout=1.0):
+        time.sleep(0.01)
+        self.seq += 1
+        return self.seq, np.zeros((48, 64, 3), np.uint8)
+
+    def stop(self):
+        self.running = False
+
+
+class FlakyRecognizer:
+    """Detection fails twice, then finds nothing"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        if self.calls <= 2:
+            raise RuntimeError("forward pass failed")
+        return []
+
+    def crops_for(self, frame, boxes):
+        return [], []
+
+
+class AlwaysRun:
+    def should_run(self, frame, busy=False):
+        return True
+
+
+def test_detection_errors_do_not_stop_the_lane():
+    recognizer = FlakyRecognizer()
+    pipeline = DetectionPipeline(StubGrabber(), recognizer, motion_gate=AlwaysRun())
+    pipeline.start()
+    deadline = time.monotonic() + 5
+    while recognizer.calls < 4 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    try:
+        assert recognizer.calls >= 4
+        assert pipeline.worker.is_alive()
+    finally:
+        pipeline.stop()
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+from plate_tracker import PlateTracker
+
+BOX = (100, 200, 220, 240)
+NEAR_BOX = (104, 201, 223, 242)
+
+
+def read(plate, confidence=90.0):
+    return SimpleNamespace(plate=plate, confidence=confidence)
+
+
+def decide(tracker, box, plate, now):
+    """Show the plate until the tracker commits it -> the PlateDecision"""
+    for step in range(10):
+        track = tracker.update_boxes([box], now=now + step * 0.1)[0]
+        decision = tracker.add_read(track.id, read(plate), now=now + step * 0.1)
+        if decision:
+            return decision
+    return None
+
+
+def test_plate_is_decided_once_per_track():
+    tracker = PlateTracker()
+    decision = decide(tracker, BOX, 'RAB123C', now=0)
+    assert decision.plate == 'RAB123C'
+    track = tracker.update_boxes([BOX], now=1)[0]
+    assert track.resolved
+    assert tracker.add_read(track.id, read('RAB123C'), now=1) is None
+
+
+def test_next_car_in_the_same_spot_gets_its_own_decision():
+    tracker = PlateTracker()
+    assert decide(tracker, BOX, 'RAB123C', now=0).plate == 'RAB123C'
+    # Detection was idle while car A left and car B pulled into the same spot
+    decision_b = decide(tracker, NEAR_BOX, 'RAD456E', now=30)
+    assert decision_b is not None and decision_b.plate == 'RAD456E'
+    decision_c = decide(tracker, BOX, 'RAF789G', now=60)
+    assert decision_c is not None and decision_c.plate == 'RAF789G'
+
+
+def test_parked_car_is_confirmed_by_one_read_without_a_new_decision():
+    tracker = PlateTracker()
+    decide(tracker, BOX, 'RAB123C', now=0)
+    # The scene was static; detection resumes with the car still there
+    track = tracker.update_boxes([NEAR_BOX], now=30)[0]
+    assert not track.resolved
+    assert tracker.add_read(track.id, read('RAB123C'), now=30) is None
+    assert track.resolved and track.from_cache
+    assert tracker.cache_hits == 1
+
+
+def test_memory_is_dropped_once_the_spot_is_seen_empty():
+    tracker = PlateTracker()
+    decide(tracker, BOX, 'RAB123C', now=0)
+    tracker.update_boxes([], now=5)  # car gone
+    assert tracker.memory == []
+    track = tracker.update_boxes([BOX], now=6)[0]
+    assert track.hint is None
+
+
+def test_tracks_expire_after_max_age():
+    tracker = PlateTracker(max_age=2.0)
+    first = tracker.update_boxes([BOX], now=0)[0]
+    assert tracker.update_boxes([BOX], now=1)[0] is first
+    assert tracker.update_boxes([BOX], now=4)[0] is not first
+
+
+def test_refused_track_is_decided_again_after_recheck():
+    tracker = PlateTracker()
+    first = decide(tracker, BOX, 'RAB123C', now=0)
+    tracker.recheck(first.track_id, after=10, now=1)
+    for now in (1.5, 3, 4.5, 6, 7.5, 9):
+        assert tracker.update_boxes([BOX], now=now)[0].resolved
+    # Still waiting at the barrier: voted on again once the interval is up
+    again = decide(tracker, BOX, 'RAB123C', now=10.5)
+    assert again is not None and again.track_id == first.track_id
+
+
+def test_refused_track_is_not_remembered():
+    tracker = PlateTracker()
+    first = decide(tracker, BOX, 'RAB123C', now=0)
+    tracker.recheck(first.track_id, after=10, now=1)
+    track = tracker.update_boxes([NEAR_BOX], now=30)[0]
+    assert track.hint is None
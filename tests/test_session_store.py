@@ -0,0 +1,105 @@
+import json
+from datetime import datetime, timedelta
+
+from session_store import Journal, OpenSession, SessionStore, apply_event
+
+ENTRY = datetime(2026, 10, 18, 8, 0)
+
+
+def test_replayed_entry_keeps_payment():
+    sessions = {}
+    apply_event(sessions, 'entry', 'RAB123C', ENTRY)
+    apply_event(sessions, 'payment', 'RAB123C', ENTRY + timedelta(hours=1))
+    apply_event(sessions, 'entry', 'RAB123C', ENTRY)
+    assert sessions['RAB123C'].paid
+
+
+def test_duplicates_from_journal_and_notify_are_harmless():
+    sessions = {}
+    paid = ENTRY + timedelta(hours=1)
+    for kind, when in [('entry', ENTRY), ('entry', ENTRY), ('payment', paid),
+                       ('entry', ENTRY), ('payment', paid)]:
+        apply_event(sessions, kind, 'RAB123C', when)
+    assert sessions['RAB123C'].paid
+    apply_event(sessions, 'exit', 'RAB123C', ENTRY + timedelta(hours=2))
+    assert sessions == {}
+
+
+def test_new_entry_replaces_an_older_session():
+    sessions = {}
+    apply_event(sessions, 'entry', 'RAB123C', ENTRY)
+    apply_event(sessions, 'payment', 'RAB123C', ENTRY + timedelta(hours=1))
+    apply_event(sessions, 'entry', 'RAB123C', ENTRY + timedelta(days=1))
+    assert not sessions['RAB123C'].paid
+
+
+def op(number, kind='entry'):
+    return {'id': f'op{number}', 'type': kind, 'plate_number': f'RAB{number:03d}C',
+            'timestamp': ENTRY.isoformat()}
+
+
+def test_journal_survives_restart_and_drops_torn_record(tmp_path):
+    path = str(tmp_path / 'gate.jsonl')
+    journal = Journal(path, fsync=False)
+    journal.append(op(1))
+    journal.append(op(2))
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"id": "op3", "ty')  # crash mid-write
+
+    reopened = Journal(path, fsync=False)
+    assert [record['id'] for record in reopened.snapshot()] == ['op1', 'op2']
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['id'] for line in f] == ['op1', 'op2']
+
+
+def test_journal_batches_one_type_and_truncates_when_drained(tmp_path):
+    path = str(tmp_path / 'gate.jsonl')
+    journal = Journal(path, fsync=False)
+    for number in range(3):
+        journal.append(op(number))
+    journal.append(op(3, 'payment'))
+    batch = journal.next_batch(timeout=0, max_size=10, linger=0)
+    assert [record['id'] for record in batch] == ['op0', 'op1', 'op2']
+    journal.done(batch)
+    assert journal.next_batch(timeout=0, linger=0)[0]['type'] == 'payment'
+    journal.done(journal.snapshot())
+    assert len(journal) == 0
+    journal.close()
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == ''
+
+
+class ExitRaceDatabase:
+    """Another gate already closed the session this store let out"""
+
+    conn_params = {}
+
+    def __init__(self):
+        self.calls = []
+
+    def authorize_exit(self, plate_number, gate_location, exit_time=None, op_id=None, deny=True):
+        self.calls.append((plate_number, deny))
+        return False
+
+
+def test_replayed_exit_never_becomes_an_unauthorized_attempt(tmp_path, capsys):
+    db = ExitRaceDatabase()
+    store = SessionStore(db, 'exit', journal_path=str(tmp_path / 'exit.jsonl'))
+    store.sessions['RAB123C'] = OpenSession('RAB123C', ENTRY, paid=True)
+    assert store.authorize_exit('RAB123C', 'Main Exit')
+    assert store._apply_batch(store.journal.next_batch(timeout=0, linger=0))
+    assert db.calls == [('RAB123C', False)]
+    assert len(store.journal) == 0
+    assert 'found no paid open session' in capsys.readouterr().out
+    store.journal.close()
+
+
+def test_direct_denials_are_deduplicated(tmp_path):
+    store = SessionStore(ExitRaceDatabase(), 'exit', journal_path=str(tmp_path / 'exit.jsonl'))
+    for _ in range(3):
+        store.record_unauthorized_exit('RAB123C', 'Main Exit')
+    store.record_unauthorized_exit('RAB123C', 'Side Exit')
+    assert [op['gate_location'] for op in store.journal.snapshot()] == ['Main Exit', 'Side Exit']
+    assert store.suppressed_denials == 2
+    store.journal.close()
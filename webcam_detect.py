@@ -1,8 +1,10 @@
-from ultralytics import YOLO
 import cv2
+from plate_recognition import get_model
 
-# Load your trained model
-model = YOLO('/opt/homebrew/runs/detect/train4/weights/best.pt')  # Update path if needed
+# Load your trained model (shared loader). This script used to load
+# /opt/homebrew/runs/detect/train4/weights/best.pt; it now uses YOLO_MODEL_PATH
+# like the gates, so point YOLO_MODEL_PATH in .env at that file to keep using it.
+model = get_model()
 
 # Open webcam (0 = default cam)
 cap = cv2.VideoCapture(0)